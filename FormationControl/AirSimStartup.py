@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from AirSimSwarm import SwarmStateFetcher
+from Barrier import wait_until
+
+def join_all(futures):
+    """
+    Wait for AirSim async calls that were issued for several vehicles.
+    """
+    for f in futures:
+        f.join()
+
+def start_swarm(client, names, alt, tout=10.0, spd=4.0, tol=0.5, settle=1.0):
+    """
+    Initialize all vehicles and bring them to the formation altitude.
+
+    Commands are issued to every vehicle before joining any of them, and
+    readiness is checked on the simulator state instead of fixed sleeps.
+
+    :param client: AirSim MultirotorClient.
+    :param names: Vehicle names.
+    :param alt: Desired altitude in meters (negative for up).
+    :param tout: Timeout of the climb in seconds.
+    :param spd: Climb speed in m/s.
+    :param tol: Altitude tolerance in meters.
+    :param settle: Time in seconds all vehicles must stay within tolerance.
+    :return: SwarmStateFetcher of the vehicles, also used for the barriers.
+    """
+    t0 = time.monotonic()
+    client.confirmConnection()
+    for name in names:
+        client.enableApiControl(True, name)
+        client.armDisarm(True, name)
+    print("All UAVs have been initialized.")
+
+    print("Taking off...")
+    join_all([client.takeoffAsync(timeout_sec=tout, vehicle_name=name) for name in names])
+    fetcher = SwarmStateFetcher(client, names)  # One batched request per check
+    wait_until(fetcher.all_flying, tout, what="all UAVs flying")
+    print("All UAVs are hovering.")
+
+    join_all([client.moveToZAsync(alt, spd, timeout_sec=tout, vehicle_name=name) for name in names])
+    wait_until(lambda: bool(np.all(np.abs(fetcher.positions()[:, 2] - alt) < tol)),
+               tout, settle=settle, what=f"altitude {alt}m")
+    print(f"UAVs reached desired altitude after {time.monotonic() - t0:.1f} s")
+    return fetcher
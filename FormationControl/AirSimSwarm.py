@@ -0,0 +1,65 @@
+import numpy as np
+
+import airsim
+
+# Columns of the kinematics array returned by SwarmStateFetcher.fetch
+KINEMATICS_FIELDS = ('x', 'y', 'z', 'qw', 'qx', 'qy', 'qz', 'vx', 'vy', 'vz', 'wx', 'wy', 'wz')
+
+def _kinematics_row(kin, row):
+    p, o = kin.position, kin.orientation
+    v, w = kin.linear_velocity, kin.angular_velocity
+    row[:] = (p.x_val, p.y_val, p.z_val,
+              o.w_val, o.x_val, o.y_val, o.z_val,
+              v.x_val, v.y_val, v.z_val,
+              w.x_val, w.y_val, w.z_val)
+
+class SwarmStateFetcher:
+    """
+    Batched multirotor state of all vehicles in one RPC round-trip.
+
+    All getMultirotorState requests are issued as msgpack-rpc call_async
+    futures on the client connection before any reply is awaited, so the
+    sense phase costs about one round-trip instead of one per vehicle.
+    """
+
+    def __init__(self, client, names):
+        """
+        :param client: AirSim MultirotorClient.
+        :param names: Vehicle names.
+        """
+        self.client = client
+        self.names = list(names)
+        n = len(self.names)
+        self.kinematics = np.full((n, len(KINEMATICS_FIELDS)), np.nan)
+        self.timestamps = np.full(n, np.nan)
+        self.landed = np.zeros(n, dtype=bool)
+
+    def fetch(self):
+        """
+        Estimated kinematics of every vehicle.
+
+        :return: Tuple (kinematics (n x 13) with columns KINEMATICS_FIELDS,
+                 simulator timestamps (n,) in seconds). The arrays are reused
+                 by the next fetch.
+        """
+        rpc = self.client.client
+        futures = [rpc.call_async('getMultirotorState', name) for name in self.names]
+        for i, f in enumerate(futures):
+            state = airsim.MultirotorState.from_msgpack(f.get())
+            _kinematics_row(state.kinematics_estimated, self.kinematics[i])
+            self.timestamps[i] = state.timestamp * 1e-9
+            self.landed[i] = state.landed_state == airsim.LandedState.Landed
+        return self.kinematics, self.timestamps
+
+    def positions(self):
+        """
+        Estimated (x, y, z) positions of every vehicle (n x 3), from a new fetch.
+        """
+        return self.fetch()[0][:, :3]
+
+    def all_flying(self):
+        """
+        Whether no vehicle reports LandedState.Landed, from a new fetch.
+        """
+        self.fetch()
+        return not self.landed.any()
@@ -0,0 +1,157 @@
+import numpy as np
+
+from GainCheck import a_c2r, check_gains, formation_vector, orthogonal_complement
+
+# Same scale as the norm(A, 'fro') <= 10 constraint of find_gains
+FRO_NORM = 10.0
+
+def _zero_pattern(adj):
+    """
+    Boolean matrix of the entries of A that must vanish (non-adjacent pairs).
+    """
+    S = ~np.asarray(adj, dtype=bool)
+    np.fill_diagonal(S, False)
+    return S
+
+def projector_gains(qsMat, adj, tol=1e-9):
+    """
+    Projector gain A = c Q Q^* onto the orthogonal complement of [z, 1].
+
+    A is Hermitian positive semidefinite with null space [z, 1], so
+    Q^* Re(A) Q >= c I / 2. It is only a valid design if Q Q^* vanishes
+    outside the adjacency pattern, which always holds for complete graphs.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param tol: Tolerance on the entries outside the adjacency pattern.
+    :return: Complex gain matrix A (n x n), or None if not valid for adj.
+    """
+    Q = orthogonal_complement(qsMat)
+    n = Q.shape[0]
+    A = (FRO_NORM / np.sqrt(n - 2)) * (Q @ np.conj(Q.T))
+
+    if np.any(np.abs(A[_zero_pattern(adj)]) > tol * FRO_NORM):
+        return None
+    A[_zero_pattern(adj)] = 0.0
+    return A
+
+def cycle_order(adj):
+    """
+    Order of the agents along the cycle if the graph is a single n-cycle.
+
+    :param adj: Graph adjacency matrix (n x n).
+    :return: List of agent indices along the cycle, or None.
+    """
+    adj = np.asarray(adj, dtype=bool).copy()
+    np.fill_diagonal(adj, False)
+    n = adj.shape[0]
+    if n < 3 or np.any(adj != adj.T) or np.any(adj.sum(axis=1) != 2):
+        return None
+
+    order = [0, int(np.flatnonzero(adj[0])[0])]
+    while len(order) < n:
+        prev, cur = order[-2], order[-1]
+        nxt = [int(j) for j in np.flatnonzero(adj[cur]) if j != prev]
+        if nxt[0] == order[0]:
+            return None  # Closed a shorter cycle
+        order.append(nxt[0])
+
+    return order if adj[order[-1], order[0]] else None
+
+def ring_gains(qsMat, adj, tol=1e-9):
+    """
+    Circulant gain for a regular polygon formation on a ring graph.
+
+    With the agents numbered along the cycle and z_k = c + w omega^k,
+    omega = exp(+-2 pi i / n), the matrix with diagonal a0 and neighbor
+    entries a1, conj(a1) annihilates [z, 1] if |a1| = 1, arg(a1) = -arg(omega)/2
+    (or pi - arg(omega)/2) and a0 = -2 Re(a1).
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param tol: Relative tolerance of the regular polygon test.
+    :return: Complex gain matrix A (n x n), or None if not applicable.
+    """
+    order = cycle_order(adj)
+    if order is None:
+        return None
+
+    n = len(order)
+    z = formation_vector(qsMat)[order]
+    w = z - z.mean()
+    if np.any(np.abs(w) <= tol * np.max(np.abs(w))):
+        return None
+
+    # Consecutive agents must be a constant rotation by +-2 pi / n apart
+    ratio = np.roll(w, -1) / w
+    omega = ratio[0]
+    if np.any(np.abs(ratio - omega) > tol) or abs(abs(np.angle(omega)) - 2 * np.pi / n) > tol:
+        return None
+
+    alpha = np.angle(omega)
+    nxt = np.roll(order, -1)
+    for theta in (-alpha / 2, np.pi - alpha / 2):
+        a1 = np.exp(1j * theta)
+        A = np.zeros((n, n), dtype=complex)
+        A[order, order] = -2 * np.real(a1)
+        A[order, nxt] = a1
+        A[nxt, order] = np.conj(a1)
+        A *= FRO_NORM / np.linalg.norm(A)
+        if check_gains(a_c2r(-A), qsMat):
+            return A
+    return None
+
+def analytic_gains(qsMat, adj):
+    """
+    Solver-free formation control gains, where a closed form is valid.
+
+    Tries the projector design (complete graphs) and the circulant design
+    (regular polygons on ring graphs). The result is verified like a cached
+    SDP solution.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :return: Real representation of the gain matrix as a (2n) x (2n) matrix, or None.
+    """
+    qsMat = np.asarray(qsMat, dtype=float)
+    if qsMat.shape[1] <= 2:
+        raise ValueError("Number of agents (n) must be greater than 2 to compute orthogonal complement.")
+
+    for design in (projector_gains, ring_gains):
+        A = design(qsMat, adj)
+        if A is not None:
+            Ar = a_c2r(-A)
+            if check_gains(Ar, qsMat):
+                return Ar
+    return None
+
+def design_gains(qsMat, adj, method="auto", **kwargs):
+    """
+    Formation control gains from the closed form or the SDP.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param method: 'analytic', 'sdp', 'decomposed' (overlapping local SDPs for
+                   large sparse graphs), or 'auto' (analytic if valid, else SDP).
+    :param kwargs: Passed to FindGains.find_gains or GainDecomposition.decomposed_find_gains.
+    :return: Real representation of the gain matrix as a (2n) x (2n) matrix.
+    """
+    if method not in ("auto", "analytic", "sdp", "decomposed"):
+        raise ValueError(f"Unknown gain design method '{method}'. Available: ['analytic', 'auto', 'decomposed', 'sdp']")
+
+    if method == "decomposed":
+        from GainDecomposition import decomposed_find_gains
+
+        return decomposed_find_gains(qsMat, adj, **kwargs)
+
+    if method != "sdp":
+        Ar = analytic_gains(qsMat, adj)
+        if Ar is not None:
+            return Ar
+        if method == "analytic":
+            raise ValueError("No closed-form gain design is valid for this formation and adjacency.")
+
+    # Imported here so that the analytic path does not load CVXPY
+    from FindGains import find_gains
+
+    return find_gains(qsMat, adj, **kwargs)
@@ -0,0 +1,36 @@
+import time
+
+def barrier_polls(check, timeout, poll=0.1, settle=0.0, what="condition"):
+    """
+    Polling schedule of a barrier on a condition, shared by the blocking and
+    the asyncio startup code.
+
+    Yields the time to sleep before the next check until the condition has
+    held for settle seconds without interruption.
+
+    :param check: Function returning True when the condition holds.
+    :param timeout: Maximum waiting time in seconds.
+    :param poll: Polling period in seconds.
+    :param settle: Time in seconds the condition must hold without interruption.
+    :param what: Description used in the timeout error.
+    """
+    t_end = time.monotonic() + timeout
+    since = None
+    while True:
+        now = time.monotonic()
+        if check():
+            since = now if since is None else since
+            if now - since >= settle:
+                return
+        else:
+            since = None
+        if now >= t_end:
+            raise TimeoutError(f"Timed out after {timeout:.0f} s waiting for {what}")
+        yield poll
+
+def wait_until(check, timeout, poll=0.1, settle=0.0, what="condition"):
+    """
+    Blocking barrier on a polled condition, see barrier_polls.
+    """
+    for delay in barrier_polls(check, timeout, poll, settle, what):
+        time.sleep(delay)
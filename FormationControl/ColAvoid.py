@@ -1,12 +1,247 @@
 import numpy as np
 
+import JitKernels
+from Neighbors import neighbor_pairs
+
+# Possible motion directions tested when a control vector is inside a cone
+# (from -180 to 180 inclusive, step 5)
+SWEEP_ANGLES = np.arange(-180, 185, 5)
+
+# Clearance in degrees of the exact heading from the side of the blocking
+# cone, so that the new heading is strictly outside the (closed) cones
+HEADING_MARGIN = 1e-3
+
 def wrap_to_180(angle):
     """
     Wrap angle to [-180, 180] degrees.
     """
     return ((angle + 180) % 360) - 180
 
-def col_avoid(dq, q, dcoll, rcoll):
+def pairwise_distances(qm):
+    """
+    Inter-agent distances for all agent pairs at once.
+
+    Parameters:
+    - qm (numpy.ndarray): Coordinates in matrix form (2, n) or stacked (2, batch, n)
+
+    Returns:
+    - Dc (numpy.ndarray): Matrix of inter-agent distances (n, n) or (batch, n, n)
+    """
+    # vec[:, ..., i, k] is the vector from agent i to agent k
+    vec = qm[..., np.newaxis, :] - qm[..., :, np.newaxis]
+    return np.sqrt(vec[0] * vec[0] + vec[1] * vec[1])
+
+def cone_bounds(Dc, tht, dcoll, rcoll):
+    """
+    Wrapped side angles [thtm, thtp] of the collision cones.
+
+    Parameters:
+    - Dc (numpy.ndarray): Distances to the neighbors
+    - tht (numpy.ndarray): Angles of the connecting vectors in degrees
+    - dcoll (float or numpy.ndarray): Collision avoidance activation distance
+    - rcoll (float or numpy.ndarray): Collision avoidance circle radius
+
+    Returns:
+    - thtm (numpy.ndarray): Lower cone side wrapped to [-180, 180]
+    - thtp (numpy.ndarray): Upper cone side wrapped to [-180, 180]
+    """
+    # 'alp' is the vertex half-angle of the collision cone
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Prevent domain error in arcsin
+        ratio = np.clip(rcoll / Dc, -1.0, 1.0)
+        alp = np.where(Dc <= dcoll, 90.0, np.abs(np.degrees(np.arcsin(ratio))))
+
+    return wrap_to_180(tht - alp), wrap_to_180(tht + alp)
+
+def in_cone(ang, thtm, thtp):
+    """
+    Element-wise test of angles against collision cones.
+
+    A cone with thtm > thtp wraps around the -180/180 boundary and covers
+    [thtm, 180] and [-180, thtp]. All inputs are broadcast against each other.
+
+    Parameters:
+    - ang (numpy.ndarray): Angles to test in degrees
+    - thtm (numpy.ndarray): Lower cone sides
+    - thtp (numpy.ndarray): Upper cone sides
+
+    Returns:
+    - inside (numpy.ndarray): True where the angle lies inside the cone
+    """
+    return np.where(thtm <= thtp,
+                    (thtm <= ang) & (ang <= thtp),
+                    (thtm <= ang) | (ang <= thtp))
+
+def sweep_heading(thtC, thtm, thtp, starts):
+    """
+    Closest feasible heading from the 5 degree sweep of SWEEP_ANGLES.
+
+    Parameters:
+    - thtC (numpy.ndarray): Control vector angles of r agents in degrees (r,)
+    - thtm (numpy.ndarray): Lower cone sides, grouped by agent (m,)
+    - thtp (numpy.ndarray): Upper cone sides, grouped by agent (m,)
+    - starts (numpy.ndarray): Index of the first cone of every agent (r,)
+
+    Returns:
+    - thtCnew (numpy.ndarray): Closest feasible sweep angle (r,)
+    - has_feas (numpy.ndarray): False where every sweep angle is blocked (r,)
+    """
+    # Determine which angles are feasible for each agent (r, 73)
+    blocked = in_cone(SWEEP_ANGLES, thtm[:, np.newaxis], thtp[:, np.newaxis])
+    angs_feas = ~np.logical_or.reduceat(blocked, starts, axis=0)
+
+    # Find closest non-colliding control direction
+    tht_diff = np.abs(wrap_to_180(thtC[:, np.newaxis] - SWEEP_ANGLES))
+    tht_diff = np.where(angs_feas, tht_diff, np.inf)
+    thtCnew = SWEEP_ANGLES[np.argmin(tht_diff, axis=1)]
+
+    return thtCnew, np.any(angs_feas, axis=1)
+
+def exact_heading(thtC, thtm, thtp, grp):
+    """
+    Closest heading on the boundary of the union of collision cones.
+
+    The cones of every agent are split at -180/180, sorted and merged into
+    disjoint intervals in O(k log k). The new heading is the nearer end of the
+    merged interval containing the control vector angle, i.e. the side of the
+    blocking cone group that is tangent to the nearest cone, moved
+    HEADING_MARGIN further out so that in_cone no longer reports it inside.
+
+    Parameters:
+    - thtC (numpy.ndarray): Control vector angles of r agents in degrees (r,)
+    - thtm (numpy.ndarray): Lower cone sides, grouped by agent (m,)
+    - thtp (numpy.ndarray): Upper cone sides, grouped by agent (m,)
+    - grp (numpy.ndarray): Agent index 0..r-1 of every cone, sorted ascending (m,)
+
+    Returns:
+    - thtCnew (numpy.ndarray): Closest feasible heading in degrees (r,)
+    - has_feas (numpy.ndarray): False where the cones cover every heading (r,)
+    """
+    r = thtC.size
+    agents = np.arange(r)
+
+    # Split the cones that wrap around the -180/180 boundary
+    wrapped = thtm > thtp
+    g = np.concatenate((grp, grp[wrapped]))
+    lo = np.concatenate((thtm, np.full(np.count_nonzero(wrapped), -180.0)))
+    hi = np.concatenate((np.where(wrapped, 180.0, thtp), thtp[wrapped]))
+
+    # Work on exact integer ranks of the angles, so that offsetting every
+    # agent by the number of distinct angles keeps the running maximum from
+    # leaking between agents without any rounding.
+    vals, ranks = np.unique(np.concatenate((lo, hi, thtC)), return_inverse=True)
+    m = lo.size
+    lo_r, hi_r, thtC_r = ranks[:m], ranks[m:2 * m], ranks[2 * m:]
+    span = vals.size
+
+    # Sort by agent, then lower side
+    order = np.lexsort((lo_r, g))
+    g, lo_r, hi_r = g[order], lo_r[order], hi_r[order]
+    off = span * g
+    reach = np.maximum.accumulate(hi_r + off) - off
+
+    # Merge overlapping (closed) intervals
+    new = np.r_[True, (g[1:] != g[:-1]) | (lo_r[1:] > reach[:-1])]
+    first = np.flatnonzero(new)
+    last = np.r_[first[1:], g.size] - 1
+    mg, ma_r, mb_r = g[first], lo_r[first], reach[last]
+    ma, mb = vals[ma_r], vals[mb_r]
+
+    # First and last merged interval of every agent
+    mfirst = np.searchsorted(mg, agents, side='left')
+    mlast = np.searchsorted(mg, agents, side='right') - 1
+
+    # Merged interval containing the control vector angle
+    idx = np.searchsorted(ma_r + span * mg, thtC_r + span * agents, side='right') - 1
+    idx = np.clip(idx, mfirst, mlast)
+    tha = ma[idx]
+    thb = mb[idx]
+
+    # Intervals touching -180 and 180 are one interval on the circle
+    at_ends = (ma[mfirst] == -180.0) & (mb[mlast] == 180.0)
+    joined = at_ends & (mfirst != mlast)
+    tha = np.where(joined & (idx == mfirst), ma[mlast], tha)
+    thb = np.where(joined & (idx == mlast), mb[mfirst], thb)
+    has_feas = ~(at_ends & (mfirst == mlast))
+
+    # Nearer side of the blocking interval, just outside of it
+    da = np.abs(wrap_to_180(thtC - tha))
+    db = np.abs(wrap_to_180(thb - thtC))
+    thtCnew = wrap_to_180(np.where(da <= db, tha - HEADING_MARGIN, thb + HEADING_MARGIN))
+
+    return np.where(has_feas, thtCnew, thtC), has_feas
+
+HEADING_SOLVERS = ('exact', 'sweep')
+
+def avoid_cones(ctrl, qm, i, k, d, dcoll, rcoll, heading='sweep'):
+    """
+    Rotate the control vectors out of the collision cones of a neighbor list.
+
+    Parameters:
+    - ctrl (numpy.ndarray): Control in matrix form (2, n), modified in place
+    - qm (numpy.ndarray): Coordinates in matrix form (2, n)
+    - i (numpy.ndarray): Agent indices of the neighbor pairs, sorted ascending (m,)
+    - k (numpy.ndarray): Neighbor indices (m,)
+    - d (numpy.ndarray): Distances from agent i to neighbor k (m,)
+    - dcoll (float or numpy.ndarray): Collision avoidance activation distance,
+      scalar or per pair (m,)
+    - rcoll (float or numpy.ndarray): Collision avoidance circle radius,
+      scalar or per pair (m,)
+    - heading (str): 'sweep' for the 5 degree reference sweep, 'exact' for
+      the interval solver
+
+    Returns:
+    - ctrl (numpy.ndarray): Modified control in matrix form (2, n)
+    """
+    if heading not in HEADING_SOLVERS:
+        raise ValueError(f"Unknown heading solver '{heading}'. Available: {HEADING_SOLVERS}")
+
+    n = ctrl.shape[1]
+
+    # Angles of the connecting vectors and the collision cones (m,)
+    vec = qm[:, k] - qm[:, i]
+    tht = np.degrees(np.arctan2(vec[1], vec[0]))
+    thtm, thtp = cone_bounds(d, tht, dcoll, rcoll)
+
+    # Control vector angles in world coordinate frame
+    thtC = np.degrees(np.arctan2(ctrl[1], ctrl[0]))
+
+    # Agents whose control vector is inside one of their collision cones
+    hit = np.bincount(i[in_cone(thtC[i], thtm, thtp)], minlength=n) > 0
+    rows = np.flatnonzero(hit)
+    if rows.size == 0:
+        return ctrl
+
+    # Cones of these agents, grouped by agent
+    sel = hit[i]
+    isel = i[sel]
+    starts = np.flatnonzero(np.r_[True, isel[1:] != isel[:-1]])
+
+    # Closest feasible heading; stop if it is not within +-90 degrees
+    if heading == 'sweep':
+        thtCnew, has_feas = sweep_heading(thtC[rows], thtm[sel], thtp[sel], starts)
+        # The reference sweep keeps the control of agents without any
+        # feasible angle unchanged
+        stopFlag = has_feas & (np.abs(wrap_to_180(thtCnew - thtC[rows])) >= 90)
+    else:
+        grp = np.cumsum(np.r_[False, isel[1:] != isel[:-1]])
+        thtCnew, has_feas = exact_heading(thtC[rows], thtm[sel], thtp[sel], grp)
+        # Stop if there is no feasible heading
+        stopFlag = ~has_feas | (np.abs(wrap_to_180(thtCnew - thtC[rows])) >= 90)
+
+    # Agents that turn to the new heading
+    turn = has_feas & ~stopFlag
+
+    # Modify control vectors
+    ctrl_norm = np.sqrt(ctrl[0, rows] ** 2 + ctrl[1, rows] ** 2)
+    ctrl_new = ctrl_norm * np.array([np.cos(np.radians(thtCnew)),
+                                     np.sin(np.radians(thtCnew))])
+    ctrl[:, rows[stopFlag]] = 0.0
+    ctrl[:, rows[turn]] = ctrl_new[:, turn]
+
+    return ctrl
+
+def col_avoid(dq, q, dcoll, rcoll, neighbors='dense', heading='sweep'):
     """
     Distributed collision avoidance by rotating the control vectors.
 
@@ -15,12 +250,20 @@ def col_avoid(dq, q, dcoll, rcoll):
     - dq (numpy.ndarray): Control direction vector (2n,)
     - dcoll (float): Collision avoidance activation distance
     - rcoll (float): Collision avoidance circle radius
+    - neighbors (str): Neighbor search, 'dense' for the full n x n scan or a
+      sparse backend of Neighbors.neighbor_pairs ('grid', 'kdtree')
+    - heading (str): 'sweep' to test the 5 degree reference directions (the
+      original behavior), 'exact' to turn to the closest heading outside the
+      cones. Unlike the sweep, 'exact' stops agents whose cones cover every
+      heading instead of keeping their control unchanged.
 
     Returns:
     - u (numpy.ndarray): Modified control vector (2n,)
     - n (int): Number of agents
     - colIdx (numpy.ndarray): Collision avoidance index matrix (n, n)
-    - Dc (numpy.ndarray): Matrix of inter-agent distances (n, n)
+    - Dc (numpy.ndarray): Matrix of inter-agent distances (n, n). With a sparse
+      backend, colIdx and Dc are scipy.sparse CSR matrices holding only the
+      pairs closer than dcoll.
     """
 
     # Number of agents
@@ -32,114 +275,96 @@ def col_avoid(dq, q, dcoll, rcoll):
     # Control in matrix form (2 x n)
     ctrl = np.asarray(dq).reshape((2, n), order='F').astype(float)
 
-    # Initialize inter-agent distance matrix
-    Dc = np.zeros((n, n))
-
-    # Compute pairwise distances
-    for i in range(n):
-        for j in range(i + 1, n):
-            Dc[i, j] = np.linalg.norm(qm[:, i] - qm[:, j])
-
-    # Make the distance matrix symmetric
-    Dc += Dc.T
-
-    # Collision avoidance indices (boolean matrix)
-    colIdx = Dc < dcoll
-
-    # Remove self-collision by setting diagonal to False
-    np.fill_diagonal(colIdx, False)
-
-    # Initialize stop flag array
-    stopFlag = np.zeros(n, dtype=bool)
-
-    for i in range(n):  # Iterate over each agent
-        cone_ang = []  # List to store collision cone angles as [thtm, thtp]
-
-        # Find collision cones based on neighbors
-        for k in range(n):
-            if colIdx[i, k]:
-                dnb = Dc[i, k]  # Distance to neighbor
-                vec = qm[:, k] - qm[:, i]  # Vector from agent i to neighbor k
-                tht = np.degrees(np.arctan2(vec[1], vec[0]))  # Angle of connecting vector
-
-                # 'alp' is the vertex half-angle of the collision cone
-                if dnb <= dcoll:
-                    alp = 90.0
-                else:
-                    # Prevent domain error in arcsin
-                    ratio = rcoll / dnb
-                    ratio = np.clip(ratio, -1.0, 1.0)
-                    alp = np.abs(np.degrees(np.arcsin(ratio)))
-
-                # Angles of the cone sides
-                thtm = tht - alp
-                thtp = tht + alp
-
-                # Wrap angles to [-180, 180]
-                thtm_wrapped = wrap_to_180(thtm)
-                thtp_wrapped = wrap_to_180(thtp)
-
-                # Handle angle wrapping across -180 or 180 degrees
-                if thtm_wrapped < -180:
-                    cone_ang.append([-180, wrap_to_180(thtp_wrapped)])
-                    cone_ang.append([thtm_wrapped + 360, 180])
-                elif thtp_wrapped > 180:
-                    cone_ang.append([thtm_wrapped, 180])
-                    cone_ang.append([-180, wrap_to_180(thtp_wrapped - 360)])
-                elif thtm_wrapped > thtp_wrapped:
-                    # Collision cone wraps around the -180/180 boundary
-                    cone_ang.append([thtm_wrapped, 180])
-                    cone_ang.append([-180, thtp_wrapped])
-                else:
-                    cone_ang.append([thtm_wrapped, thtp_wrapped])
-
-        if np.any(colIdx[i, :]):  # If collision avoidance is needed
-            # Control vector angle in world coordinate frame
-            thtC = np.degrees(np.arctan2(ctrl[1, i], ctrl[0, i]))
-
-            # Check if control vector is inside any collision cone
-            inside_cone = False
-            for cone in cone_ang:
-                if cone[0] <= thtC <= cone[1]:
-                    inside_cone = True
-                    break
-
-            if inside_cone:
-                # Possible motion directions to test
-                angs = np.arange(-180, 185, 5)  # From -180 to 180 inclusive, step 5
-                angs_idx = np.ones_like(angs, dtype=bool)  # Start with all True
-
-                # Determine which angles are inside the collision cones
-                for idx, r in enumerate(angs):
-                    for cone in cone_ang:
-                        if cone[0] <= r <= cone[1]:
-                            angs_idx[idx] = False
-                            break
-
-                angs_feas = angs[angs_idx]  # Feasible directions to take
-
-                # If there is no feasible angle, stop
-                if angs_feas.size == 0:
-                    stopFlag[i] = True
-                else:
-                    # Find closest non-colliding control direction
-                    tht_diff = np.abs(wrap_to_180(thtC - angs_feas))
-                    min_idx = np.argmin(tht_diff)
-                    thtCnew = angs_feas[min_idx]
-
-                    # Check if the feasible control direction is within +-90 degrees
-                    if np.abs(wrap_to_180(thtCnew - thtC)) >= 90:
-                        stopFlag[i] = True
-
-                    # Modify control vector
-                    if stopFlag[i]:
-                        ctrl[:, i] = np.zeros(2)
-                    else:
-                        ctrl_norm = np.linalg.norm(ctrl[:, i])
-                        ctrl[:, i] = ctrl_norm * np.array([np.cos(np.radians(thtCnew)),
-                                                           np.sin(np.radians(thtCnew))])
+    if JitKernels.BACKEND == 'numba' and neighbors == 'dense':
+        if heading == 'exact':
+            ctrl, colIdx, Dc = JitKernels.col_avoid_kernel(qm, ctrl, float(dcoll), float(rcoll), HEADING_MARGIN)
+            return ctrl.flatten(order='F'), n, colIdx, Dc
+        if heading == 'sweep':
+            ctrl, colIdx, Dc = JitKernels.sweep_col_avoid_kernel(qm, ctrl, float(dcoll), float(rcoll),
+                                                                 SWEEP_ANGLES.astype(float))
+            return ctrl.flatten(order='F'), n, colIdx, Dc
+
+    if neighbors == 'dense':
+        # Compute pairwise distances
+        Dc = pairwise_distances(qm)
+
+        # Collision avoidance indices (boolean matrix)
+        colIdx = Dc < dcoll
+
+        # Remove self-collision by setting diagonal to False
+        np.fill_diagonal(colIdx, False)
+
+        i, k = np.nonzero(colIdx)
+        d = Dc[i, k]
+    else:
+        # SciPy is only needed for the sparse backends
+        from scipy import sparse
+
+        # Only the pairs within the activation distance
+        i, k, d = neighbor_pairs(qm, dcoll, method=neighbors)
+        colIdx = sparse.csr_matrix((np.ones(i.size, dtype=bool), (i, k)), shape=(n, n))
+        Dc = sparse.csr_matrix((d, (i, k)), shape=(n, n))
+
+    # Rotate the control vectors out of the collision cones
+    avoid_cones(ctrl, qm, i, k, d, dcoll, rcoll, heading)
 
     # Flatten the control matrix back to a vector in column-major order
     u = ctrl.flatten(order='F')
 
-    return u, n, colIdx, Dc
\ No newline at end of file
+    return u, n, colIdx, Dc
+
+def col_avoid_batch(dq, q, dcoll, rcoll, heading='sweep'):
+    """
+    Collision avoidance for a stack of independent formation states.
+
+    Every row is processed with the same cone semantics as col_avoid, in a
+    single vectorized pass over all states.
+
+    Parameters:
+    - q (numpy.ndarray): Stacked aggregate coordinate vectors (batch, 2n)
+    - dq (numpy.ndarray): Stacked control direction vectors (batch, 2n)
+    - dcoll (float or numpy.ndarray): Collision avoidance activation distance,
+      scalar or per state (batch,)
+    - rcoll (float or numpy.ndarray): Collision avoidance circle radius,
+      scalar or per state (batch,)
+    - heading (str): 'exact' or 'sweep', see col_avoid
+
+    Returns:
+    - u (numpy.ndarray): Modified control vectors (batch, 2n)
+    - n (int): Number of agents
+    - colIdx (numpy.ndarray): Collision avoidance index matrices (batch, n, n)
+    - Dc (numpy.ndarray): Matrices of inter-agent distances (batch, n, n)
+    """
+    q = np.atleast_2d(np.asarray(q, dtype=float))
+    dq = np.atleast_2d(np.asarray(dq, dtype=float))
+    if q.shape != dq.shape:
+        raise ValueError(f"q and dq must have the same shape, got {q.shape} and {dq.shape}.")
+
+    # Number of states and agents
+    batch = q.shape[0]
+    n = q.shape[1] // 2
+
+    # Collision parameters per state
+    dcoll = np.broadcast_to(np.asarray(dcoll, dtype=float), (batch,))
+    rcoll = np.broadcast_to(np.asarray(rcoll, dtype=float), (batch,))
+
+    # All agents of all states side by side in matrix form (2 x batch*n)
+    qm = q.reshape((batch * n, 2)).T.copy()
+    ctrl = dq.reshape((batch * n, 2)).T.copy()
+
+    # Pairwise distances within every state
+    Dc = pairwise_distances(qm.reshape((2, batch, n)))
+
+    # Collision avoidance indices without self-collision
+    colIdx = Dc < dcoll[:, np.newaxis, np.newaxis]
+    colIdx[:, np.arange(n), np.arange(n)] = False
+
+    # Neighbor pairs in global agent numbering (sorted by agent)
+    b, i, k = np.nonzero(colIdx)
+    d = Dc[b, i, k]
+
+    avoid_cones(ctrl, qm, b * n + i, b * n + k, d, dcoll[b], rcoll[b], heading)
+
+    u = ctrl.T.reshape((batch, 2 * n))
+
+    return u, n, colIdx, Dc
@@ -0,0 +1,288 @@
+import asyncio
+import math
+import time
+
+OVERRUN_POLICIES = ('skip', 'catch_up')
+
+class RunningStat:
+    """
+    Count, mean, standard deviation and maximum of a stream of values (Welford).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.max = x if self.count == 1 else max(self.max, x)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+class RateScheduler:
+    """
+    Fixed-rate loop timing on absolute deadlines.
+
+    Tick k is due at t0 + k * period, so compute and I/O time do not add up
+    to drift as with sleep(period) after the work. If a tick's work runs past
+    the next deadline, the overrun policy decides what happens:
+
+    - 'skip': drop the missed deadlines and wait for the next future one
+    - 'catch_up': run the missed ticks back to back until on schedule again
+
+    Usage:
+        scheduler = RateScheduler(0.25)
+        while True:
+            await scheduler.tick_async()  # or scheduler.tick() in synchronous loops
+            ...
+    """
+
+    def __init__(self, period, overrun='skip', clock=time.monotonic):
+        """
+        :param period: Loop period in seconds.
+        :param overrun: Overrun policy, one of OVERRUN_POLICIES.
+        :param clock: Monotonic time source in seconds.
+        """
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{overrun}'. Available: {list(OVERRUN_POLICIES)}")
+        if period <= 0:
+            raise ValueError("The period must be positive.")
+
+        self.period = float(period)
+        self.overrun = overrun
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """
+        Restart the schedule and clear the counters; the next tick is due immediately.
+        """
+        self.deadline = None  # Deadline of the current tick
+        self.ticks = 0
+        self.overruns = 0  # Ticks whose work ran past the next deadline
+        self.missed = 0  # Deadlines dropped by the 'skip' policy
+        self.latency = RunningStat()  # Wake-up time after the deadline
+        self.interval = RunningStat()  # Time between tick starts
+        self.work = RunningStat()  # Time from tick start to the next tick() call
+        self._start = None
+
+    def _next_deadline(self, now):
+        """
+        Account for the finished tick and return the deadline of the next one.
+        """
+        if self.deadline is None:
+            return now
+
+        self.work.add(now - self._start)
+        deadline = self.deadline + self.period
+        if now > deadline:
+            self.overruns += 1
+            if self.overrun == 'skip':
+                skipped = math.ceil((now - deadline) / self.period)
+                self.missed += skipped
+                deadline += skipped * self.period
+        return deadline
+
+    def _begin(self, deadline):
+        now = self.clock()
+        if self._start is not None:
+            self.interval.add(now - self._start)
+        self.latency.add(max(0.0, now - deadline))
+        self.deadline = deadline
+        self._start = now
+        self.ticks += 1
+        return now
+
+    def tick(self):
+        """
+        Wait for the next deadline (synchronous loops).
+
+        :return: Start time of the tick on the scheduler clock.
+        """
+        deadline = self._next_deadline(self.clock())
+        delay = deadline - self.clock()
+        if delay > 0:
+            time.sleep(delay)
+        return self._begin(deadline)
+
+    async def tick_async(self):
+        """
+        Wait for the next deadline without blocking the event loop.
+
+        :return: Start time of the tick on the scheduler clock.
+        """
+        deadline = self._next_deadline(self.clock())
+        delay = deadline - self.clock()
+        # Always yield once so other tasks (telemetry, setpoints) can run
+        await asyncio.sleep(max(0.0, delay))
+        return self._begin(deadline)
+
+    def stats(self):
+        """
+        Timing counters of the loop.
+
+        :return: Dict with the tick, overrun and missed-deadline counts, the
+                 mean and maximum latency, the jitter (standard deviation of
+                 the tick interval) and the mean and maximum work time, in seconds.
+        """
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'missed': self.missed,
+            'latency_mean': self.latency.mean,
+            'latency_max': self.latency.max,
+            'jitter': self.interval.std,
+            'period_mean': self.interval.mean,
+            'work_mean': self.work.mean,
+            'work_max': self.work.max,
+        }
+
+    def summary(self):
+        """
+        One-line report of stats() in milliseconds.
+        """
+        s = self.stats()
+        return (f"ticks {s['ticks']}, overruns {s['overruns']}, missed {s['missed']}, "
+                f"period {1e3 * s['period_mean']:.1f} ms, jitter {1e3 * s['jitter']:.2f} ms, "
+                f"latency {1e3 * s['latency_mean']:.2f}/{1e3 * s['latency_max']:.2f} ms, "
+                f"work {1e3 * s['work_mean']:.1f}/{1e3 * s['work_max']:.1f} ms")
+
+class MultiRateScheduler:
+    """
+    Two-rate loop timing: a fast inner loop with a slower outer loop on top.
+
+    Every tick is an inner tick of a RateScheduler at the inner period. The
+    inner tick nearest to each outer deadline (t0 + k * outer_period) is
+    also an outer tick, so cheap work (collision avoidance, saturation) runs
+    every tick and expensive work (formation law) only on outer ticks. Work
+    times are recorded separately for outer and inner ticks.
+
+    Usage:
+        scheduler = MultiRateScheduler(0.25, 0.05)
+        while True:
+            now, outer = await scheduler.tick_async()
+            if outer:
+                ...  # slow loop
+            ...  # fast loop
+    """
+
+    def __init__(self, outer_period, inner_period, overrun='skip', clock=time.monotonic):
+        """
+        :param outer_period: Period of the slow loop in seconds.
+        :param inner_period: Period of the fast loop in seconds, at most outer_period.
+        :param overrun: Overrun policy of both loops, one of OVERRUN_POLICIES.
+        :param clock: Monotonic time source in seconds.
+        """
+        if inner_period > outer_period:
+            raise ValueError("The inner period must not be longer than the outer period.")
+        self.inner = RateScheduler(inner_period, overrun, clock)
+        self.outer_period = float(outer_period)
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """
+        Restart both schedules and clear the counters; the next tick is an outer tick.
+        """
+        self.inner.reset()
+        self.outer_deadline = None  # Deadline of the latest outer tick
+        self.outer_ticks = 0
+        self.outer_missed = 0  # Outer deadlines dropped by the 'skip' policy
+        self.outer_latency = RunningStat()  # Outer tick start after its deadline
+        self.outer_interval = RunningStat()  # Time between outer tick starts
+        self.outer_work = RunningStat()  # Work time of outer ticks
+        self.inner_work = RunningStat()  # Work time of inner-only ticks
+        self._outer = False
+        self._start = None
+        self._outer_start = None
+
+    def _finish(self, now):
+        if self._start is not None:
+            (self.outer_work if self._outer else self.inner_work).add(now - self._start)
+
+    def _begin(self, now):
+        deadline = self.inner.deadline
+        if self.outer_deadline is None:
+            outer_deadline = deadline
+        else:
+            outer_deadline = self.outer_deadline + self.outer_period
+            if deadline - outer_deadline >= self.outer_period and self.inner.overrun == 'skip':
+                skipped = math.floor((deadline - outer_deadline) / self.outer_period)
+                self.outer_missed += skipped
+                outer_deadline += skipped * self.outer_period
+
+        # Outer tick on the inner deadline nearest to the outer deadline
+        self._outer = deadline + self.inner.period / 2 > outer_deadline
+        if self._outer:
+            if self._outer_start is not None:
+                self.outer_interval.add(now - self._outer_start)
+            self.outer_latency.add(max(0.0, now - outer_deadline))
+            self.outer_deadline = outer_deadline
+            self._outer_start = now
+            self.outer_ticks += 1
+        self._start = now
+        return now, self._outer
+
+    def tick(self):
+        """
+        Wait for the next inner deadline (synchronous loops).
+
+        :return: Tuple (start time of the tick on the scheduler clock, whether it is an outer tick).
+        """
+        self._finish(self.clock())
+        return self._begin(self.inner.tick())
+
+    async def tick_async(self):
+        """
+        Wait for the next inner deadline without blocking the event loop.
+
+        :return: Tuple (start time of the tick on the scheduler clock, whether it is an outer tick).
+        """
+        self._finish(self.clock())
+        return self._begin(await self.inner.tick_async())
+
+    def stats(self):
+        """
+        Timing counters of both loops.
+
+        :return: Dict with the RateScheduler.stats() of the inner loop under
+                 'inner', and the tick and missed counts, mean period, jitter,
+                 latency and work times of the outer loop under 'outer'. The
+                 inner work times of the 'inner' entry include outer ticks;
+                 'inner_work_mean' and 'inner_work_max' exclude them.
+        """
+        inner = self.inner.stats()
+        inner['inner_work_mean'] = self.inner_work.mean
+        inner['inner_work_max'] = self.inner_work.max
+        return {
+            'inner': inner,
+            'outer': {
+                'ticks': self.outer_ticks,
+                'missed': self.outer_missed,
+                'period_mean': self.outer_interval.mean,
+                'jitter': self.outer_interval.std,
+                'latency_mean': self.outer_latency.mean,
+                'latency_max': self.outer_latency.max,
+                'work_mean': self.outer_work.mean,
+                'work_max': self.outer_work.max,
+            },
+        }
+
+    def summary(self):
+        """
+        One-line report of stats() in milliseconds.
+        """
+        s = self.stats()
+        i, o = s['inner'], s['outer']
+        return (f"outer: ticks {o['ticks']}, missed {o['missed']}, period {1e3 * o['period_mean']:.1f} ms, "
+                f"jitter {1e3 * o['jitter']:.2f} ms, work {1e3 * o['work_mean']:.1f}/{1e3 * o['work_max']:.1f} ms | "
+                f"inner: ticks {i['ticks']}, overruns {i['overruns']}, missed {i['missed']}, "
+                f"period {1e3 * i['period_mean']:.1f} ms, jitter {1e3 * i['jitter']:.2f} ms, "
+                f"work {1e3 * i['inner_work_mean']:.1f}/{1e3 * i['inner_work_max']:.1f} ms")
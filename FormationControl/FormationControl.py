@@ -4,8 +4,13 @@ import math
 import numpy as np
 import time
 
-from FindGains import find_gains
+from GainCache import formation_gains
 from ColAvoid import col_avoid
+from FormationStep import FormationEngine
+from HierarchicalFormation import HierarchicalFormation
+from Topology import build_topology, topology_savings
+from AirSimStartup import start_swarm
+from ControlScheduler import RateScheduler
 
 # Total number of UAVs
 numUAV = 3
@@ -34,6 +39,13 @@ Adjm = np.array([
 #     [0, 1, 0]
 # ], dtype=float)
 
+# Communication graph derived from the formation (see Topology.TOPOLOGIES),
+# e.g. "delaunay", "knn" or "bounded"; None keeps the hand-written Adjm
+topology = None
+if topology is not None:
+    Adjm = build_topology(qs, method=topology)
+print("Topology cost relative to the complete graph:", topology_savings(Adjm))
+
 # Desired waypoints for the formation
 
 # # Square Path
@@ -85,58 +97,23 @@ for i in range(numUAV):
     pos0[i, 1] = -4 + 4.0 * i
     pos0[i, 2] = 0
 
-# Find formation control gains
-Am = find_gains(qs, Adjm)
-print("Formation Control Gains (Am):\n", Am)
-
-A = np.asarray(Am)
-print("Gain matrix calculated.")
-
-# Connect to the AirSim simulator
+# Connect to the AirSim simulator and bring all UAVs to altitude
 client = airsim.MultirotorClient()
-client.confirmConnection()
-
-for i in range(numUAV):
-    name = "UAV" + str(i + 1)
-    client.enableApiControl(True, name)
-    client.armDisarm(True, name)
-print("All UAVs have been initialized.")
-
-# Hover
-time.sleep(2)
-
-tout = 3  # Timeout in seconds
-spd = 2  # Speed
-
-print("Taking off...")
-for i in range(numUAV):
-    name = "UAV" + str(i + 1)
-    print('Hovering', name)
-    client.hoverAsync(vehicle_name=name)
-    client.moveToPositionAsync(0, 0, -1, spd, timeout_sec=tout, vehicle_name=name)
-print("All UAVs are hovering.")
-
-# Increase altitude
-tout = 10.0  # Timeout in seconds
-spd = 4.0  # Speed
 alt = -20.0  # Altitude
-
-time.sleep(0.5)
-
-for i in range(numUAV):
-    name = "UAV" + str(i + 1)
-    print('Moving', name)
-    client.moveToPositionAsync(0, 0, alt, spd, timeout_sec=tout, vehicle_name=name)
-print("UAVs reached desired altitude")
+names = [f"UAV{i+1}" for i in range(numUAV)]
+fetcher = start_swarm(client, names, alt)  # Batched state of all UAVs
 
 # Formation control loop parameters
 dcoll = 3  # Collision avoidance activation distance
 rcoll = 1.4  # Collision avoidance circle radius
+heading = 'exact'  # Heading solver of col_avoid ('exact', or the 5 degree reference 'sweep')
 gain = 2.0 / 3  # Control gain
 kp_centroid = 0.2 # Proportional gain for centroid movement
 duration = 0.25  # Max duration for applying input
+control_period = 0.1  # Control loop period (commands overlap, each lasts duration)
 vmax = 0.8  # Saturation velocity
 save = 0  # Set to 1 to save control input
+group_size = None  # Drones per sub-formation for hierarchical control (None: one flat formation)
 
 def compute_formation_centroid(q, numUAV):
     """
@@ -168,24 +145,34 @@ def calculate_yaw_from_velocity(velocity_vector):
 time.sleep(0.5)
 
 # Formation control loop
+if group_size is None:
+    # Find formation control gains (precomputed library, closed form or cached SDP)
+    Am = formation_gains(qs, Adjm)
+    print("Formation Control Gains (Am):\n", Am)
+
+    A = np.asarray(Am)
+    print("Gain matrix calculated.")
+    engine = FormationEngine(A, Adjm, gain)  # Sparse formation step operator
+else:
+    engine = HierarchicalFormation(qs, group_size, gain)  # Sub-formations plus centroid formation
 itr = 0
 debounce_count = 0
 debounce_threshold = 3  # Number of consecutive iterations within threshold
+scheduler = RateScheduler(control_period, overrun='skip')  # Ticks on absolute deadlines
 
 while True:
+    scheduler.tick()
 
     itr += 1
     print(f"Iteration {itr}")
 
-    # Get UAV positions using GPS data
+    # Get UAV positions using GPS data (one batched request for all UAVs)
     q = np.zeros(3 * numUAV)      # State vector (x, y, z) for all UAVs
     qxy = np.zeros(2 * numUAV)    # State vector (x, y) for all UAVs
     drone_positions = []         # List to store drone positions
+    kinematics, stamps = fetcher.fetch()
     for i in range(numUAV):
-        name = f"UAV{i+1}"
-        state = client.getMultirotorState(vehicle_name=name)
-        pos = state.kinematics_estimated.position
-        qi = np.array([pos.x_val, pos.y_val, pos.z_val]) + pos0[i, :]
+        qi = kinematics[i, :3] + pos0[i, :]
         q[3 * i:3 * i + 3] = qi
         qxy[2 * i:2 * i + 2] = qi[:2]
         drone_positions.append(qi[:3])
@@ -202,39 +189,18 @@ while True:
     # Compute control input for centroid movement (only x and y)
     centroid_control = kp_centroid * error[:2]  # [x_error, y_error]
 
-    # Compute relative positions based on adjacency matrix
-    T = np.zeros((numUAV * numUAV, 3))
-    for i in range(numUAV):
-        for j in range(numUAV):
-            if Adjm[i, j] == 1:
-                rel_pos = q[3 * j:3 * j + 3] - q[3 * i:3 * i + 3]
-                T[i * numUAV + j, :] = rel_pos
-            else:
-                T[i * numUAV + j, :] = np.zeros(3)
-
-    # Control computation based on relative positions
-    dqxy = np.zeros(2 * numUAV)  # Preallocate control input vector
-    for i in range(numUAV):
-        # Extract relative positions in 2D (x, y) for UAV i
-        qxyi = T[i * numUAV: (i + 1) * numUAV, 0:2].flatten()
-        # Control input calculation
-        dqxyi = A[2 * i: 2 * i + 2, :].dot(qxyi)
-        dqxy[2 * i:2 * i + 2] = gain * dqxyi
+    # Control computation based on relative positions of adjacent UAVs
+    dqxy = engine.step(q)
 
     # Distribute the centroid control equally to all UAVs
-    for i in range(numUAV):
-        dqxy[2 * i:2 * i + 2] += centroid_control
+    dqxy.reshape((numUAV, 2))[:] += centroid_control
 
     # Collision avoidance
-    u, n, colIdx, Dc = col_avoid(dqxy.tolist(), qxy.tolist(), dcoll, rcoll)
+    u, n, colIdx, Dc = col_avoid(dqxy.tolist(), qxy.tolist(), dcoll, rcoll, heading=heading)
     u = np.asarray(u).flatten()
 
     # Saturate velocity control command
-    for i in range(numUAV):
-        ui = u[2 * i:2 * i + 2]
-        vel = np.linalg.norm(ui)
-        if vel > vmax:
-            u[2 * i:2 * i + 2] = (vmax / vel) * ui
+    engine.saturate(u, vmax)
 
     if save == 1:
         np.save("SavedData/u" + str(itr), dqxy)  # Save control input before collision avoidance
@@ -274,4 +240,5 @@ while True:
         current_waypoint_idx = (current_waypoint_idx + 1) % len(waypoints)
         desired_centroid = waypoints[current_waypoint_idx]
 
+    print(f"Loop timing: {scheduler.summary()}")
     print("-" * 50)
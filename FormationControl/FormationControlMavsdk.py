@@ -1,12 +1,19 @@
 import asyncio
 import math
-from mavsdk import System
-from mavsdk.offboard import OffboardError, VelocityNedYaw, PositionNedYaw
+from mavsdk.offboard import OffboardError, VelocityNedYaw
 import numpy as np
 import time
 
-from FindGains import find_gains
+from GainCache import formation_gains
 from ColAvoid import col_avoid
+from FormationStep import FormationEngine
+from Topology import build_topology, topology_savings
+from TelemetryHub import TelemetryHub
+from MavsdkStartup import start_swarm
+from ControlScheduler import MultiRateScheduler
+from ProgressiveGains import ProgressiveGains
+from SetpointStreamer import SetpointStreamer
+from StateEstimator import SwarmEstimator
 
 # --------------------------------------------
 # Configuration and Definitions
@@ -39,6 +46,13 @@ Adjm = np.array([
 #     [0, 1, 0]
 # ], dtype=float)
 
+# Communication graph derived from the formation (see Topology.TOPOLOGIES),
+# e.g. "delaunay", "knn" or "bounded"; None keeps the hand-written Adjm
+topology = None
+if topology is not None:
+    Adjm = build_topology(qs, method=topology)
+print("Topology cost relative to the complete graph:", topology_savings(Adjm))
+
 # Desired waypoints for the formation
 
 # # Square Path
@@ -90,117 +104,28 @@ for i in range(numUAV):
     pos0[i, 1] = -4 + 4.0 * i
     pos0[i, 2] = 0
 
-# Find formation control gains
-Am = find_gains(qs, Adjm)
+# Find formation control gains (precomputed library, closed form or cached SDP)
+Am = formation_gains(qs, Adjm)
 print("Formation Control Gains (Am):\n", Am)
 
 A = np.asarray(Am)
 print("Gain matrix calculated.")
 
-# --------------------------------------------
-# Drone Initialization and Connection
-# --------------------------------------------
-
-async def init_drone(port):
-    """
-    Initialize and connect to a drone via MAVSDK on the specified port.
-    
-    :param port: The MAVSDK server port for the drone.
-    :return: Connected drone System instance.
-    """
-    drone = System(mavsdk_server_address="localhost", port=port)
-    await drone.connect()
-    async for state in drone.core.connection_state():
-        if state.is_connected:
-            print(f"Drone on port {port} connected")
-            break
-    # Set telemetry update rates for position and velocity
-    await drone.telemetry.set_rate_position_velocity_ned(10)
-    return drone
-
-async def setup_drones():
-    """
-    Set up and connect to all drones based on the number of UAVs.
-    
-    :return: List of connected drone System instances.
-    """
-    drones = []
-    ports = [50051 + i for i in range(numUAV)]  # Assign unique ports for each drone
-    for port in ports:
-        drone = await init_drone(port)
-        drones.append(drone)
-    return drones
-
-# --------------------------------------------
-# Arm and Takeoff Procedures
-# --------------------------------------------
-
-async def arm_and_takeoff(drone, altitude):
-    """
-    Arm the drone and command it to take off to the specified altitude.
-    
-    :param drone: Connected drone System instance.
-    :param altitude: Desired altitude in meters (negative for down).
-    """
-    print("Arming...")
-    await drone.action.arm()
-    print("Taking off...")
-    await drone.action.takeoff()
-    await asyncio.sleep(5)  # Allow the drone to stabilize after takeoff
-    print(f"Ascending to altitude {altitude}m")
-    
-    # Start offboard mode and set initial position
-    await start_offboard_mode(drone)
-    try:
-        # Position setpoint: x=0, y=0, z=altitude (NED coordinates)
-        await drone.offboard.set_position_ned(PositionNedYaw(0.0, 0.0, altitude, 0.0))
-    except OffboardError as e:
-        print(f"Setting initial position failed: {e._result.result}")
-        await drone.offboard.stop()
-        await drone.action.disarm()
-        return
-    
-    # Wait until the drone reaches the desired altitude with smoothing
-    smoothed_altitude = 0.0
-    alpha = 0.9  # Smoothing factor
-    
-    async for position in drone.telemetry.position_velocity_ned():
-        current_altitude = position.position.down_m
-        smoothed_altitude = alpha * smoothed_altitude + (1 - alpha) * current_altitude
-        print(f"Smoothed altitude: {smoothed_altitude:.2f}m")
-        if abs(smoothed_altitude - altitude) < 0.5:
-            print("Reached target altitude")
-            break
-        await asyncio.sleep(0.1)
-    await asyncio.sleep(2)  # Allow for stabilization
-
-async def start_offboard_mode(drone):
-    """
-    Initiate offboard mode by sending initial setpoints and starting offboard.
-    
-    :param drone: Connected drone System instance.
-    """
-    print("Sending initial setpoints...")
-    for _ in range(40):  # Send enough setpoints to ensure PX4 accepts offboard mode
-        await drone.offboard.set_velocity_ned(VelocityNedYaw(0.0, 0.0, 0.0, 0.0))
-        await asyncio.sleep(0.025)  # 25ms interval between setpoints
-    try:
-        await drone.offboard.start()
-        print("Offboard mode started")
-    except OffboardError as e:
-        print(f"Offboard start failed: {e._result.result}")
-        await drone.action.disarm()
-        raise
+# Keep refining the gains in the background while flying (see ProgressiveGains)
+progressive_gains = True
 
 # --------------------------------------------
 # Formation Control Loop
 # --------------------------------------------
 
-async def formation_control(drones):
+async def formation_control(drones, gains=None, hub=None):
     """
     Main loop for controlling the drone formation and navigating through waypoints.
     
     :param drones: List of connected drone System instances.
+    :param gains: Optional ProgressiveGains instance; its latest published gains
+                  are picked up between ticks instead of the fixed matrix A.
+    :param hub: Started TelemetryHub of the drones; one is created if not given.
     """
 
     global current_waypoint_idx
@@ -208,75 +133,101 @@ async def formation_control(drones):
     # Formation control parameters
     dcoll = 3.0  # Collision avoidance activation distance in meters
     rcoll = 1.4  # Collision avoidance circle radius in meters
+    heading = 'exact'  # Heading solver of col_avoid ('exact', or the 5 degree reference 'sweep')
     gain = 2.0 / 3  # Control gain for formation
-    duration = 0.25  # Control loop duration in seconds
+    duration = 0.25  # Formation loop period in seconds
+    avoid_period = 0.05  # Collision avoidance and saturation loop period in seconds
     vmax = 0.8  # Saturation velocity in m/s
     velocity_damping = 0.9  # Damping factor to reduce oscillations
     error_threshold = 0.01  # Dead zone for small errors
+    pipelined = True  # Stream setpoints from background tasks while the next tick is computed
+    setpoint_rate = 10.0  # Heartbeat rate of unchanged setpoints in Hz (keeps offboard mode alive)
+    telemetry_deadline = 0.02  # Longest wait per formation tick for new telemetry in seconds
     
     itr = 0  # Iteration counter
     debounce_count = 0
     debounce_threshold = 3  # Number of consecutive iterations within threshold
-    previous_positions = np.zeros((numUAV, 3))  # For smoothing positions
+
+    # One long-lived telemetry stream per drone, read as a snapshot every tick
+    if hub is None:
+        hub = TelemetryHub(drones)
+        await hub.start()
+        await hub.wait_ready()
+    engine = FormationEngine(A, Adjm, gain)  # Sparse formation step operator
+    gains_version = 0
+    scheduler = MultiRateScheduler(duration, avoid_period, overrun='skip')  # Formation and avoidance rates
+    streamer = SetpointStreamer(drones, send_velocity, heartbeat=setpoint_rate) if pipelined else None
+    estimator = SwarmEstimator(numUAV)  # Position and velocity filter for all drones
+    last_tick = -math.inf
     
     while True:
-        itr += 1
-        print(f"--- Iteration: {itr} ---")
+        tick_start, outer = await scheduler.tick_async()
+    
+        if outer:
+            itr += 1
+            print(f"--- Iteration: {itr} ---")
+    
+            # Swap in refined gains if a newer version was published (non-blocking)
+            if gains is not None:
+                A_new, adj_new, version = gains.latest()
+                if version != gains_version:
+                    if np.array_equal(adj_new, engine.adj):
+                        engine.set_gains(A_new)
+                    else:
+                        engine = FormationEngine(A_new, adj_new, gain)  # New topology
+                    gains_version = version
+                    print(f"Using formation gains version {version}")
+    
+            # Samples newer than the previous formation tick, waiting at most telemetry_deadline for slow links
+            values, stamps, fresh = await hub.gather(last_tick, telemetry_deadline)
+            last_tick = tick_start
+        else:
+            # Avoidance-only tick: latest telemetry without waiting
+            values, stamps = hub.snapshot()
+        estimator.update(values, stamps)
     
         # Get UAV positions
         q = np.zeros(3 * numUAV)      # State vector (x, y, z) for all UAVs
         qxy = np.zeros(2 * numUAV)    # State vector (x, y) for all UAVs
-        tasks = [get_position(drone) for drone in drones]
-        positions = await asyncio.gather(*tasks)
+    
+        # Filtered positions predicted to when this tick's commands take effect;
+        # stale drones are extrapolated from their latest sample
+        actuation_lead = streamer.latency.mean() if streamer is not None else 0.0
+        positions = estimator.predict(time.monotonic() + actuation_lead)
     
         for i, pos in enumerate(positions):
-            # Smooth positions to mitigate noise
-            smooth_pos = 0.95 * previous_positions[i] + 0.05 * np.array(pos)
-            previous_positions[i] = smooth_pos
-            qi = smooth_pos + pos0[i, :]
+            qi = pos + pos0[i, :]
             q[3 * i:3 * i + 3] = qi
             qxy[2 * i:2 * i + 2] = qi[:2]
     
-        # Compute the centroid of the formation
-        centroid = await compute_formation_centroid(q, numUAV)
+        if outer:
+            # Compute the centroid of the formation
+            centroid = await compute_formation_centroid(q, numUAV)
     
-        # Desired centroid position is the current waypoint
-        desired_centroid = waypoints[current_waypoint_idx]
+            # Desired centroid position is the current waypoint
+            desired_centroid = waypoints[current_waypoint_idx]
     
-        # Compute error between desired centroid and current centroid
-        error = desired_centroid - centroid  # 3D error
-        error_magnitude = np.linalg.norm(error[:2])  # 2D error magnitude
+            # Compute error between desired centroid and current centroid
+            error = desired_centroid - centroid  # 3D error
+            error_magnitude = np.linalg.norm(error[:2])  # 2D error magnitude
     
-        # Compute control input for centroid movement (only x and y)
-        kp_centroid = 0.2  # Proportional gain for centroid movement
-        centroid_control = kp_centroid * error[:2]  # [vx_error, vy_error]
+            # Compute control input for centroid movement (only x and y)
+            kp_centroid = 0.2  # Proportional gain for centroid movement
+            centroid_control = kp_centroid * error[:2]  # [vx_error, vy_error]
     
-        # Compute relative positions based on adjacency matrix
-        T = np.zeros((numUAV * numUAV, 3))
-        for i in range(numUAV):
-            for j in range(numUAV):
-                if Adjm[i, j] == 1:
-                    rel_pos = q[3 * j:3 * j + 3] - q[3 * i:3 * i + 3]
-                    T[i * numUAV + j, :] = rel_pos
-                else:
-                    T[i * numUAV + j, :] = np.zeros(3)
+            # Control computation based on relative positions of adjacent UAVs
+            dqxy = engine.step(q)
     
-        # Control computation based on relative positions
-        dqxy = np.zeros(2 * numUAV)
-        for i in range(numUAV):
-            # Extract relative positions in 2D (x, y) for UAV i
-            qxyi = T[i * numUAV: (i + 1) * numUAV, 0:2].flatten()
-            # Control input calculation using formation gains
-            dqxyi = A[2 * i: 2 * i + 2, :].dot(qxyi)
-            dqxy[2 * i:2 * i + 2] = gain * dqxyi
+            # Integrate centroid movement with formation control
+            # Distribute the centroid control equally to all UAVs
+            dqxy.reshape((numUAV, 2))[:] += centroid_control
     
-        # Integrate centroid movement with formation control
-        # Distribute the centroid control equally to all UAVs
-        for i in range(numUAV):
-            dqxy[2 * i:2 * i + 2] += centroid_control
+            # Calculate desired yaw based on centroid's movement direction
+            desired_yaw = await calculate_yaw_from_velocity(centroid_control)
+            yaw = desired_yaw if desired_yaw is not None else 0.0
     
-        # Collision avoidance
-        u, n, colIdx, Dc = col_avoid(dqxy.tolist(), qxy.tolist(), dcoll, rcoll)
+        # Collision avoidance on every tick, against the formation input of the latest formation tick
+        u, n, colIdx, Dc = col_avoid(dqxy.tolist(), qxy.tolist(), dcoll, rcoll, heading=heading)
         u = np.asarray(u).flatten()
     
         # Gradual velocity scaling to ramp up speed
@@ -285,7 +236,7 @@ async def formation_control(drones):
     
         # Predict future positions and enforce separation
         qxy_reshaped = qxy.reshape(numUAV, 2)
-        future_positions = qxy_reshaped + duration * u.reshape(numUAV, 2)
+        future_positions = qxy_reshaped + avoid_period * u.reshape(numUAV, 2)  # Until the next command
         for i in range(numUAV):
             for j in range(i + 1, numUAV):
                 future_distance = np.linalg.norm(future_positions[i] - future_positions[j])
@@ -297,21 +248,17 @@ async def formation_control(drones):
         u = velocity_damping * u
     
         # Saturate velocity and apply dead zone
-        for i in range(numUAV):
-            ui = u[2 * i:2 * i + 2]
-            distance = np.linalg.norm(ui)
-            if distance > 0:
-                u[2 * i:2 * i + 2] *= min(1.0, distance / vmax)
-            if distance < error_threshold:
-                u[2 * i:2 * i + 2] = 0.0
-    
-        # Calculate desired yaw based on centroid's movement direction
-        desired_yaw = await calculate_yaw_from_velocity(centroid_control)
-        yaw = desired_yaw if desired_yaw is not None else 0.0
+        engine.soft_saturate(u, vmax, error_threshold)
     
         # Apply control command with yaw
-        tasks = [send_velocity(drone, u[2 * i], u[2 * i + 1], 0.0, yaw) for i, drone in enumerate(drones)]
-        await asyncio.gather(*tasks)
+        commands = [(u[2 * i], u[2 * i + 1], 0.0, yaw) for i in range(numUAV)]
+        if streamer is not None:
+            streamer.update(commands)
+        else:
+            await asyncio.gather(*[send_velocity(drone, *cmd) for drone, cmd in zip(drones, commands)])
+    
+        if not outer:
+            continue
     
         # Logging
         print(f"Current Waypoint: {current_waypoint_idx + 1}/{len(waypoints)}")
@@ -330,26 +277,19 @@ async def formation_control(drones):
         else:
             debounce_count = 0  # Reset counter if outside threshold
     
+        print(f"Loop timing: {scheduler.summary()}")
+        if not np.all(fresh):
+            print(f"Stale telemetry (predicted): drones {np.flatnonzero(~fresh).tolist()}")
+        print(f"Telemetry intervals: {hub.intervals['position_velocity_ned'].summary()}")
+        if streamer is not None:
+            print(f"Setpoints: {streamer.summary()}")
+            print(f"Setpoint round-trips: {streamer.round_trips.summary()}")
         print("-" * 50)
-        await asyncio.sleep(duration)  # Control loop duration
 
 # --------------------------------------------
 # Helper Functions
 # --------------------------------------------
 
-async def get_position(drone):
-    """
-    Retrieve the current position of the drone.
-    
-    :param drone: Connected drone System instance.
-    :return: Tuple containing (north_m, east_m, down_m).
-    """
-    async for position in drone.telemetry.position_velocity_ned():
-        north_m = position.position.north_m
-        east_m = position.position.east_m
-        down_m = position.position.down_m
-        return (north_m, east_m, down_m)
-
 async def send_velocity(drone, vx, vy, vz, yaw):
     """
     Send velocity commands to the drone in NED coordinates with yaw control.
@@ -403,15 +343,18 @@ async def main():
     """
     Main function to set up drones, arm, takeoff, and start formation control.
     """
-    # Initialize drones
-    drones = await setup_drones()
-    
-    # Arm and takeoff all drones to the desired altitude
-    tasks = [arm_and_takeoff(drone, -20.0) for drone in drones]
-    await asyncio.gather(*tasks)
+    # Refinement runs in the background during startup
+    gains = None
+    if progressive_gains:
+        gains = ProgressiveGains()
+        gains.start(qs, Adjm)
+
+    # Connect, arm and take off all drones concurrently
+    ports = [50051 + i for i in range(numUAV)]  # Assign unique ports for each drone
+    drones, hub = await start_swarm(ports, -20.0)
     
     # Start formation control loop
-    await formation_control(drones)
+    await formation_control(drones, gains=gains, hub=hub)
 
 # --------------------------------------------
 # Script Execution
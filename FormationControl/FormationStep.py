@@ -0,0 +1,205 @@
+import numpy as np
+
+import JitKernels
+
+def formation_input(q, A, Adjm, gain):
+    """
+    Formation control input from the relative positions of adjacent UAVs.
+
+    Parameters:
+    - q (numpy.ndarray): State vector (x, y, z) for all UAVs (3n,)
+    - A (numpy.ndarray): Formation control gain matrix (2n, 2n)
+    - Adjm (numpy.ndarray): Adjacency matrix (n, n)
+    - gain (float): Control gain
+
+    Returns:
+    - dqxy (numpy.ndarray): Control input (x, y) for all UAVs (2n,)
+    """
+    q = np.asarray(q, dtype=float)
+    A = np.asarray(A, dtype=float)
+    Adjm = np.asarray(Adjm)
+
+    if JitKernels.BACKEND == 'numba':
+        return JitKernels.formation_input_kernel(q, A, Adjm, float(gain))
+
+    n = Adjm.shape[0]
+    pos = q.reshape((n, 3))[:, :2]
+
+    # rel[i, j] is the relative position of UAV j with respect to UAV i
+    rel = pos[np.newaxis, :, :] - pos[:, np.newaxis, :]
+    rel = np.where((Adjm == 1)[:, :, np.newaxis], rel, 0.0)
+
+    # dqxy_i = sum_j A[2i:2i+2, 2j:2j+2] rel[i, j]
+    dqxy = np.einsum('iajb,ijb->ia', A.reshape((n, 2, n, 2)), rel)
+
+    return gain * dqxy.reshape(2 * n)
+
+def csr_matvec(indptr, indices, data, x, out, gather):
+    """
+    out = M x for a CSR matrix M without empty rows, without allocating.
+
+    Parameters:
+    - indptr, indices, data (numpy.ndarray): CSR arrays of M
+    - x (numpy.ndarray): Input vector
+    - out (numpy.ndarray): Output buffer (rows of M,)
+    - gather (numpy.ndarray): Work buffer (nonzeros of M,)
+
+    Returns:
+    - out (numpy.ndarray): The output buffer
+    """
+    if JitKernels.BACKEND == 'numba':
+        return JitKernels.csr_matvec_kernel(indptr, indices, data, x, out)
+
+    # mode='clip' avoids the temporary that index checking needs, the indices are valid
+    np.take(x, indices, out=gather, mode='clip')
+    np.multiply(gather, data, out=gather)
+    np.add.reduceat(gather, indptr[:-1], out=out)
+    return out
+
+class VelocitySaturation:
+    """
+    Per-UAV velocity saturation and dead zone with preallocated buffers.
+    """
+
+    def __init__(self, n):
+        """
+        Parameters:
+        - n (int): Number of UAVs
+        """
+        self.n = n
+        self._norm = np.empty(n)
+        self._scale = np.empty(n)
+        self._mask = np.empty(n, dtype=bool)
+
+    def _apply_scale(self, u, threshold):
+        # Dead zone on the norm before scaling, then scale each UAV's (x, y) pair
+        np.less(self._norm, threshold, out=self._mask)
+        np.copyto(self._scale, 0.0, where=self._mask)
+        U = u.reshape((self.n, 2))
+        np.multiply(U, self._scale[:, np.newaxis], out=U)
+        return u
+
+    def saturate(self, u, vmax, threshold=0.0):
+        """
+        Clip every UAV's velocity to vmax and zero those below threshold, in place.
+
+        Parameters:
+        - u (numpy.ndarray): Velocity commands (x, y) for all UAVs (2n,)
+        - vmax (float): Saturation velocity
+        - threshold (float): Dead zone for small commands
+
+        Returns:
+        - u (numpy.ndarray): The modified input array
+        """
+        U = u.reshape((self.n, 2))
+        np.hypot(U[:, 0], U[:, 1], out=self._norm)
+        np.maximum(self._norm, vmax, out=self._scale)
+        np.divide(vmax, self._scale, out=self._scale)
+        return self._apply_scale(u, threshold)
+
+    def soft_saturate(self, u, vmax, threshold=0.0):
+        """
+        Scale every UAV's velocity by min(1, |u_i| / vmax) and zero those
+        below threshold, in place (the smoothing used by the MAVSDK loop).
+
+        Parameters:
+        - u (numpy.ndarray): Velocity commands (x, y) for all UAVs (2n,)
+        - vmax (float): Saturation velocity
+        - threshold (float): Dead zone for small commands
+
+        Returns:
+        - u (numpy.ndarray): The modified input array
+        """
+        U = u.reshape((self.n, 2))
+        np.hypot(U[:, 0], U[:, 1], out=self._norm)
+        np.divide(self._norm, vmax, out=self._scale)
+        np.minimum(self._scale, 1.0, out=self._scale)
+        return self._apply_scale(u, threshold)
+
+class FormationEngine(VelocitySaturation):
+    """
+    Precomputed sparse formation control step.
+
+    The formation input dqxy_i = gain * sum_j A_ij (q_j - q_i) over the
+    adjacent UAVs j is linear in the state vector q, so it is stored as one
+    CSR operator M = gain * (A_N - blockdiag(sum_j A_N,ij)), where A_N keeps
+    the 2 x 2 gain blocks of adjacent pairs. Its columns index the (x, y, z)
+    state vector directly, and every step is a single sparse matvec into
+    preallocated buffers.
+    """
+
+    def __init__(self, A, Adjm, gain):
+        """
+        Parameters:
+        - A (numpy.ndarray): Formation control gain matrix (2n, 2n)
+        - Adjm (numpy.ndarray): Adjacency matrix (n, n)
+        - gain (float): Control gain
+        """
+        Adjm = np.asarray(Adjm)
+        n = Adjm.shape[0]
+        super().__init__(n)
+        self.adj = Adjm == 1
+        np.fill_diagonal(self.adj, False)
+
+        # 2 x 2 blocks of the neighbors and the UAV itself, sorted by (i, j)
+        self._bi, self._bj = np.nonzero(self.adj | np.eye(n, dtype=bool))
+        nb = self._bi.size
+
+        # Entry (k, a, b) of the blocks goes to row 2 bi + a and column 3 bj + b
+        a, b = np.meshgrid([0, 1], [0, 1], indexing='ij')
+        rows = (2 * self._bi[:, np.newaxis, np.newaxis] + a).ravel()
+        cols = (3 * self._bj[:, np.newaxis, np.newaxis] + b).ravel()
+        self._perm = np.lexsort((cols, rows))
+
+        self.indices = cols[self._perm]
+        self.indptr = np.zeros(2 * n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=2 * n), out=self.indptr[1:])
+        self.data = np.empty(4 * nb)
+
+        # Reused by every step
+        self._gather = np.empty(4 * nb)
+        self._out = np.empty(2 * n)
+
+        self.set_gains(A, gain)
+
+    def set_gains(self, A, gain=None):
+        """
+        Replace the gain matrix (and optionally the control gain) for the same adjacency.
+        """
+        if gain is not None:
+            self.gain = float(gain)
+        n = self.n
+        A4 = np.asarray(A, dtype=float).reshape((n, 2, n, 2)).transpose(0, 2, 1, 3)
+
+        blocks = A4[self._bi, self._bj].copy()
+        own = self._bi == self._bj
+        # Diagonal block: minus the sum of the neighbor blocks of the row
+        rowsum = np.zeros((n, 2, 2))
+        np.add.at(rowsum, self._bi[~own], blocks[~own])
+        blocks[own] = -rowsum[self._bi[own]]
+
+        self.data[:] = self.gain * blocks.reshape(-1)[self._perm]
+
+    @property
+    def operator(self):
+        """
+        Step operator M as a scipy.sparse CSR matrix (2n, 3n).
+        """
+        from scipy import sparse
+
+        return sparse.csr_matrix((self.data.copy(), self.indices, self.indptr), shape=(2 * self.n, 3 * self.n))
+
+    def step(self, q, out=None):
+        """
+        Formation control input, same result as formation_input(q, A, Adjm, gain).
+
+        Parameters:
+        - q (numpy.ndarray): State vector (x, y, z) for all UAVs (3n,)
+        - out (numpy.ndarray): Optional output buffer (2n,); defaults to an
+          internal buffer that is overwritten by the next step
+
+        Returns:
+        - dqxy (numpy.ndarray): Control input (x, y) for all UAVs (2n,)
+        """
+        out = self._out if out is None else out
+        return csr_matvec(self.indptr, self.indices, self.data, q, out, self._gather)
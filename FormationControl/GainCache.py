@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+from importlib import metadata
+
+import numpy as np
+
+from GainCheck import check_gains
+
+# Bump when the gain design or the file layout changes
+CACHE_VERSION = 1
+
+# Cache location, can be overridden with the FORMATION_GAIN_CACHE variable
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "formation_gains")
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+def formation_key(qsMat, adj):
+    """
+    Content hash of a formation and its adjacency.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :return: Hex digest of the coordinates and the adjacency pattern.
+    """
+    qsMat = np.ascontiguousarray(qsMat, dtype=np.float64)
+    adj = np.ascontiguousarray(adj, dtype=bool)
+
+    h = hashlib.sha256()
+    h.update(repr(qsMat.shape).encode())
+    h.update(qsMat.tobytes())
+    h.update(repr(adj.shape).encode())
+    h.update(adj.tobytes())
+    return h.hexdigest()
+
+def gain_key(qsMat, adj, solver="SCS", solver_opts=None):
+    """
+    Content hash identifying a gain design problem.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param solver: CVXPY solver name.
+    :param solver_opts: Additional solver keyword arguments.
+    :return: Hex digest of the formation, adjacency, solver settings and library versions.
+    """
+    h = hashlib.sha256()
+    h.update(formation_key(qsMat, adj).encode())
+    h.update(json.dumps({
+        "cache_version": CACHE_VERSION,
+        "solver": str(solver),
+        "solver_opts": solver_opts or {},
+        "cvxpy": _package_version("cvxpy"),
+        "scs": _package_version("scs"),
+        "numpy": np.__version__,
+    }, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def load_gains(path, qsMat, tol=1e-5):
+    """
+    Load a cached gain matrix and verify it against the formation.
+
+    :param path: Path of the cached .npy file.
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param tol: Tolerance of the null-space constraints.
+    :return: Gain matrix, or None if missing, unreadable or invalid.
+    """
+    try:
+        Ar = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    if not check_gains(Ar, qsMat, tol):
+        return None
+    return Ar
+
+def save_gains(path, Ar):
+    """
+    Atomically write a gain matrix to the cache.
+
+    :param path: Path of the .npy file.
+    :param Ar: Gain matrix.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, Ar)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def cached_find_gains(qsMat, adj, solver="SCS", solver_opts=None, cache_dir=None, tol=1e-5):
+    """
+    find_gains with a persistent on-disk cache.
+
+    Gains are looked up by a hash of the formation, the adjacency, the solver
+    settings and the library versions. Cached matrices are checked for the
+    [z, 1] null space and a positive lambda_min(Q^* Re(A) Q) before use, and
+    re-solved otherwise.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param solver: CVXPY solver name.
+    :param solver_opts: Additional solver keyword arguments.
+    :param cache_dir: Cache directory (default: FORMATION_GAIN_CACHE or ~/.cache/formation_gains).
+    :param tol: Tolerance of the null-space constraints.
+    :return: Real representation of the gain matrix as a (2n) x (2n) matrix.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("FORMATION_GAIN_CACHE", DEFAULT_CACHE_DIR)
+    path = os.path.join(cache_dir, gain_key(qsMat, adj, solver, solver_opts) + ".npy")
+
+    Ar = load_gains(path, qsMat, tol)
+    if Ar is not None:
+        return Ar
+
+    # Imported here so that cache hits do not load CVXPY
+    from FindGains import find_gains
+
+    Ar = find_gains(qsMat, adj, solver=solver, solver_opts=solver_opts)
+    try:
+        save_gains(path, Ar)
+    except OSError as e:
+        print(f"Could not write gain cache {path}: {e}")
+    return Ar
+
+def formation_gains(qsMat, adj, cache_dir=None):
+    """
+    Gains for a mission start without solving when possible.
+
+    Tries the precomputed gain library, then the closed-form designs of
+    AnalyticGains, and finally the SDP through the on-disk cache.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param cache_dir: Cache directory for the SDP fallback.
+    :return: Real representation of the gain matrix as a (2n) x (2n) matrix.
+    """
+    from AnalyticGains import analytic_gains
+    from GainLibrary import library_gains
+
+    Ar = library_gains(qsMat, adj)
+    if Ar is None:
+        Ar = analytic_gains(qsMat, adj)
+    if Ar is None:
+        Ar = cached_find_gains(qsMat, adj, cache_dir=cache_dir)
+    return Ar
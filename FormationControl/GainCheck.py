@@ -0,0 +1,149 @@
+import numpy as np
+
+def formation_vector(qsMat):
+    """
+    Complex representation of the desired formation coordinates.
+
+    Parameters:
+    ----------
+    qsMat : numpy.ndarray
+        Desired formation coordinates as a 2 x n matrix.
+
+    Returns:
+    -------
+    z : numpy.ndarray
+        Complex coordinates p + 1j * q of the n agents.
+    """
+    qsMat = np.asarray(qsMat, dtype=float)
+    return qsMat[0, :] + 1j * qsMat[1, :]
+
+def orthogonal_complement(qsMat):
+    """
+    Orthonormal basis of the orthogonal complement of [z, ones(n,1)].
+
+    Parameters:
+    ----------
+    qsMat : numpy.ndarray
+        Desired formation coordinates as a 2 x n matrix.
+
+    Returns:
+    -------
+    Q : numpy.ndarray
+        Complex matrix of shape (n, n-2).
+    """
+    z = formation_vector(qsMat)
+    n = z.size
+
+    # Stack [z, ones(n,1)] to form an n x 2 complex matrix
+    stacked = np.column_stack((z, np.ones(n, dtype=complex)))
+
+    # Perform Singular Value Decomposition (SVD) to find orthogonal complement
+    U, S_vals, Vh = np.linalg.svd(stacked, full_matrices=True)
+
+    # Extract the orthogonal complement matrix Q from U
+    return U[:, 2:n]
+
+def a_c2r(An):
+    """
+    Transform a complex matrix to its real block matrix representation.
+
+    Parameters:
+    ----------
+    An : numpy.ndarray
+        A complex matrix of shape (n, n), or a stack of shape (n, n, numA).
+
+    Returns:
+    -------
+    AnR : numpy.ndarray
+        A real matrix of shape (2n, 2n) (or (2n, 2n, numA)) representing the
+        real and imaginary parts.
+    """
+    if An.ndim not in (2, 3):
+        raise ValueError("An must be a 2D or 3D complex numpy array.")
+
+    n = An.shape[0]
+    re = np.real(An)
+    im = np.imag(An)
+
+    # Each entry becomes the 2 x 2 block [[re, -im], [im, re]]
+    AnR = np.zeros((2 * n, 2 * n) + An.shape[2:], dtype=float)
+    AnR[0::2, 0::2] = re
+    AnR[0::2, 1::2] = -im
+    AnR[1::2, 0::2] = im
+    AnR[1::2, 1::2] = re
+
+    return AnR
+
+def a_r2c(Ar):
+    """
+    Recover the complex gain matrix A from the real representation of -A.
+
+    Inverse of FindGains.a_c2r(-A).
+
+    Parameters:
+    ----------
+    Ar : numpy.ndarray
+        Real gain matrix of shape (2n, 2n).
+
+    Returns:
+    -------
+    A : numpy.ndarray
+        Complex matrix of shape (n, n).
+    """
+    Ar = np.asarray(Ar, dtype=float)
+    return -(Ar[0::2, 0::2] + 1j * Ar[1::2, 0::2])
+
+def gain_margin(Ar, qsMat):
+    """
+    Residuals and convergence margin of a formation control gain matrix.
+
+    Parameters:
+    ----------
+    Ar : numpy.ndarray
+        Real representation of the gain matrix as a (2n) x (2n) matrix.
+    qsMat : numpy.ndarray
+        Desired formation coordinates as a 2 x n matrix.
+
+    Returns:
+    -------
+    residual : float
+        Largest entry of |A [z, 1]| relative to the Frobenius norm of A.
+    lam_min : float
+        Smallest eigenvalue of Q^* Re(A) Q.
+    """
+    A = a_r2c(Ar)
+    z = formation_vector(qsMat)
+    Q = orthogonal_complement(qsMat)
+
+    scale = max(np.linalg.norm(A), np.finfo(float).tiny)
+    residual = max(np.max(np.abs(A @ z)), np.max(np.abs(A.sum(axis=1)))) / scale
+
+    QAQ = np.conj(Q.T) @ np.real(A) @ Q
+    lam_min = np.linalg.eigvalsh((QAQ + np.conj(QAQ.T)) / 2)[0]
+
+    return residual, lam_min
+
+def check_gains(Ar, qsMat, tol=1e-5):
+    """
+    Check that a gain matrix stabilizes the desired formation.
+
+    Parameters:
+    ----------
+    Ar : numpy.ndarray
+        Real representation of the gain matrix as a (2n) x (2n) matrix.
+    qsMat : numpy.ndarray
+        Desired formation coordinates as a 2 x n matrix.
+    tol : float
+        Tolerance of the null-space constraints A [z, 1] == 0.
+
+    Returns:
+    -------
+    valid : bool
+        True if A [z, 1] vanishes and lambda_min(Q^* Re(A) Q) is positive.
+    """
+    n = np.asarray(qsMat).shape[1]
+    if np.shape(Ar) != (2 * n, 2 * n) or not np.all(np.isfinite(Ar)):
+        return False
+
+    residual, lam_min = gain_margin(Ar, qsMat)
+    return residual <= tol and lam_min > 0
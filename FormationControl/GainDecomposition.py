@@ -0,0 +1,189 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, reverse_cuthill_mckee
+from scipy.sparse.linalg import LinearOperator, eigsh
+
+from AnalyticGains import FRO_NORM
+from GainCheck import formation_vector
+
+def bandwidth_order(adj):
+    """
+    Reverse Cuthill-McKee ordering of the formation graph.
+
+    :param adj: Graph adjacency matrix (n x n).
+    :return: Tuple (order, bandwidth) of the agent permutation and the
+             largest |i - j| over the edges in that order.
+    """
+    A = sparse.csr_matrix(np.asarray(adj, dtype=bool))
+    order = reverse_cuthill_mckee(A, symmetric_mode=True)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    i, j = A.nonzero()
+    bandwidth = int(np.max(np.abs(rank[i] - rank[j]))) if i.size else 0
+    return order, bandwidth
+
+def _cluster_shape(bandwidth, cluster_size=None, overlap=None):
+    """
+    Cluster size and overlap with the defaults of overlapping_clusters filled in.
+    """
+    if overlap is None:
+        overlap = max(3, bandwidth)
+    if cluster_size is None:
+        cluster_size = max(2 * overlap + 2, 3 * bandwidth)
+    return cluster_size, overlap
+
+def overlapping_clusters(adj, cluster_size=None, overlap=None):
+    """
+    Overlapping windows of consecutive agents in bandwidth order.
+
+    Consecutive clusters share `overlap` agents, which ties the local null
+    spaces [z, 1] together into the global one.
+
+    :param adj: Graph adjacency matrix (n x n).
+    :param cluster_size: Agents per cluster, defaults to about three bandwidths.
+    :param overlap: Agents shared by consecutive clusters, defaults to the bandwidth (at least 3).
+    :return: List of agent index arrays.
+    """
+    n = np.shape(adj)[0]
+    order, bandwidth = bandwidth_order(adj)
+    cluster_size, overlap = _cluster_shape(bandwidth, cluster_size, overlap)
+    if overlap < 2 or cluster_size <= overlap:
+        raise ValueError("Clusters must overlap in at least 2 agents and be larger than the overlap.")
+
+    if n <= cluster_size:
+        raise ValueError(f"Clusters of {cluster_size} agents cover all {n} agents (graph bandwidth {bandwidth}), "
+                         "so the decomposition would solve the full SDP. Use find_gains, or a smaller "
+                         "cluster_size and overlap.")
+
+    step = cluster_size - overlap
+    starts = list(range(0, n - cluster_size, step)) + [n - cluster_size]
+    return [order[s:s + cluster_size] for s in starts]
+
+def _solve_cluster(args):
+    """
+    Local gain design on one cluster subgraph (runs in a worker process).
+    """
+    from FindGains import find_gains
+
+    qsMat, adj, solver = args
+    return find_gains(qsMat, adj, solver=solver, psd=True)
+
+def sparse_gain_margin(Ar, qsMat):
+    """
+    GainCheck.gain_margin for a sparse gain matrix, without dense factorizations.
+
+    lambda_min(Q^* Re(A) Q) is the smallest eigenvalue of the projection of
+    Re(A) onto the complement of [z, 1]; it is found with ARPACK on that
+    projection, with [z, 1] shifted above the spectrum. Each iteration costs
+    one sparse product with A.
+
+    :param Ar: Real representation of the gain matrix, scipy.sparse (2n) x (2n).
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :return: Tuple (residual, lam_min) as in GainCheck.gain_margin.
+    """
+    Ar = sparse.csr_matrix(Ar)
+    A = -(Ar[0::2, 0::2] + 1j * Ar[1::2, 0::2])
+    z = formation_vector(qsMat)
+    n = z.size
+
+    scale = max(sparse.linalg.norm(A), np.finfo(float).tiny)
+    residual = max(np.max(np.abs(A @ z)), np.max(np.abs(A @ np.ones(n)))) / scale
+
+    ReA = A.real.tocsr()
+    V = np.linalg.qr(np.column_stack((z, np.ones(n, dtype=complex))))[0]
+    shift = abs(ReA).sum(axis=1).max() + 1.0  # Above every eigenvalue of Re(A)
+
+    def matvec(x):
+        x = np.ravel(x)
+        c = np.conj(V.T) @ x
+        y = ReA @ (x - V @ c)
+        return y - V @ (np.conj(V.T) @ y) + shift * (V @ c)
+
+    op = LinearOperator((n, n), matvec=matvec, dtype=complex)
+    lam_min = eigsh(op, k=1, which='SA', tol=1e-10, return_eigenvectors=False)[0]
+    return residual, float(lam_min)
+
+def _assemble(clusters, local, n):
+    """
+    Sum of the local (2w) x (2w) gain blocks in the global real representation.
+    """
+    rows, cols, vals = [], [], []
+    for c, Ar_c in zip(clusters, local):
+        idx = np.column_stack((2 * c, 2 * c + 1)).ravel()
+        r, k = np.nonzero(Ar_c)
+        rows.append(idx[r])
+        cols.append(idx[k])
+        vals.append(Ar_c[r, k])
+    # Duplicate entries of overlapping clusters are summed
+    return sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(2 * n, 2 * n))
+
+def decomposed_find_gains(qsMat, adj, cluster_size=None, overlap=None, solver="SCS", max_workers=1, dense=True,
+                          retries=3, growth=1.5, margin=1e-6):
+    """
+    Gain design for large sparse graphs from overlapping local SDPs.
+
+    Each cluster is solved with find_gains(..., psd=True) on its own
+    subgraph, so every local gain matrix A_c is Hermitian positive
+    semidefinite with [z_C, 1] in its null space. Their sum is then positive
+    semidefinite as well, with null space the intersection of the local
+    ones. That intersection is exactly [z, 1] when the overlapping clusters
+    pin down the formation; it can be larger when the cluster subgraphs are
+    too sparse, which sparse_gain_margin detects as lambda_min <= margin. The
+    clusters and overlaps are then grown by the factor growth and the design
+    is repeated, at most retries times.
+
+    The sum is assembled as a sparse matrix and rescaled to the Frobenius
+    norm of find_gains. The cost grows linearly in n for a fixed graph
+    bandwidth, instead of with the dense (n-2) x (n-2) matrix of the global
+    SDP. Graphs whose bandwidth is too large for at least two clusters are
+    rejected.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param cluster_size: Agents per cluster, see overlapping_clusters.
+    :param overlap: Agents shared by consecutive clusters, see overlapping_clusters.
+    :param solver: CVXPY solver for the local problems.
+    :param max_workers: Worker processes for the local problems (1 solves in-process).
+    :param dense: Return a dense array; otherwise a scipy.sparse CSR matrix.
+    :param retries: Designs with larger clusters after a failed verification.
+    :param growth: Factor by which cluster size and overlap grow on every retry.
+    :param margin: Smallest accepted lambda_min; smaller values are solver noise on a larger null space.
+    :return: Real representation of the gain matrix as a (2n) x (2n) matrix.
+    """
+    qsMat = np.array(qsMat, dtype=float)
+    adj = np.array(adj, dtype=bool)
+    n = qsMat.shape[1]
+
+    if connected_components(sparse.csr_matrix(adj), directed=False)[0] > 1:
+        raise ValueError("The formation graph is not connected.")
+
+    cluster_size, overlap = _cluster_shape(bandwidth_order(adj)[1], cluster_size, overlap)
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            overlap = int(np.ceil(growth * overlap))
+            cluster_size = max(int(np.ceil(growth * cluster_size)), 2 * overlap + 2)
+            if cluster_size >= n:
+                break
+
+        clusters = overlapping_clusters(adj, cluster_size, overlap)
+        jobs = [(qsMat[:, c], adj[np.ix_(c, c)], solver) for c in clusters]
+        if max_workers == 1:
+            local = [_solve_cluster(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                local = list(pool.map(_solve_cluster, jobs))
+        Ar = _assemble(clusters, local, n)
+
+        # Frobenius norm of the complex A: every complex entry appears twice in its real 2 x 2 block
+        Ar *= FRO_NORM / (sparse.linalg.norm(Ar) / np.sqrt(2))
+
+        residual, lam_min = sparse_gain_margin(Ar, qsMat)
+        if residual <= 1e-5 and lam_min > margin:
+            return Ar.toarray() if dense else Ar
+
+    raise ValueError(f"Decomposed gains are not valid (residual {residual:.2e}, lambda_min {lam_min:.2e}) "
+                     f"with clusters of {cluster_size} agents overlapping in {overlap}. "
+                     "Use find_gains for this graph.")
@@ -0,0 +1,235 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GainCache import formation_key
+from GainCheck import check_gains
+
+# Standard formation shapes and sizes of the catalog
+CATALOG_SHAPES = ("line", "triangle", "wedge", "grid", "circle")
+CATALOG_SIZES = (3, 4, 5, 6, 8, 10)
+SPACING = 4.0  # Distance between neighboring agents in meters
+
+# Library location, can be overridden with the FORMATION_GAIN_LIBRARY variable
+DEFAULT_LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gain_library.npz")
+
+# Libraries opened by library_gains: absolute path -> (file version, GainLibrary)
+_OPEN_LIBRARIES = {}
+
+def formation_shape(shape, n, spacing=SPACING):
+    """
+    Desired formation coordinates of a standard shape.
+
+    :param shape: One of CATALOG_SHAPES.
+    :param n: Number of agents.
+    :param spacing: Distance between neighboring agents in meters.
+    :return: Desired formation coordinates as a 2 x n matrix.
+    """
+    qs = np.zeros((2, n))
+    if shape == "line":
+        qs[0, :] = spacing * np.arange(n)
+    elif shape == "triangle":
+        # Rows filled from the base, each row one agent shorter and 3/4 spacing higher
+        rows = int(np.ceil((np.sqrt(8 * n + 1) - 1) / 2))
+        i = 0
+        for r in range(rows):
+            for j in range(rows - r):
+                if i < n:
+                    qs[:, i] = [spacing * (j + r / 2), 0.75 * spacing * r]
+                    i += 1
+    elif shape == "wedge":
+        # Leader at the apex, followers alternating left and right behind it
+        for i in range(1, n):
+            rank = (i + 1) // 2
+            side = 1 if i % 2 else -1
+            qs[:, i] = [-rank * spacing / np.sqrt(2), side * rank * spacing / np.sqrt(2)]
+    elif shape == "grid":
+        side = int(np.ceil(np.sqrt(n)))
+        idx = np.arange(n)
+        qs[0, :] = spacing * (idx % side)
+        qs[1, :] = spacing * (idx // side)
+    elif shape == "circle":
+        radius = spacing / (2 * np.sin(np.pi / n))
+        angle = 2 * np.pi * np.arange(n) / n
+        qs[0, :] = radius * np.cos(angle)
+        qs[1, :] = radius * np.sin(angle)
+    else:
+        raise ValueError(f"Unknown formation shape '{shape}'. Available: {CATALOG_SHAPES}")
+    return qs
+
+def complete_adjacency(n):
+    """
+    Adjacency matrix of the complete graph, as used by the formation scripts.
+    """
+    return np.ones((n, n)) - np.eye(n)
+
+def _solve_entry(entry):
+    """
+    Solve one catalog entry (runs in a worker process).
+
+    :param entry: Tuple (shape, n, qsMat, adj).
+    :return: Tuple (shape, n, qsMat, adj, Ar, solve time in seconds).
+    """
+    from FindGains import find_gains
+
+    shape, n, qsMat, adj = entry
+    t0 = time.perf_counter()
+    Ar = find_gains(qsMat, adj)
+    return shape, n, qsMat, adj, Ar, time.perf_counter() - t0
+
+def build_library(path=None, shapes=CATALOG_SHAPES, sizes=CATALOG_SIZES, spacing=SPACING, max_workers=None):
+    """
+    Solve a catalog of formations across a process pool and write a gain library.
+
+    The library is a single .npz file holding every gain matrix with its
+    formation and adjacency, plus a JSON index from the formation content key
+    and from "shape:n" to the entry.
+
+    :param path: Output file (default: FORMATION_GAIN_LIBRARY or gain_library.npz).
+    :param shapes: Formation shapes to include.
+    :param sizes: Numbers of agents to include.
+    :param spacing: Distance between neighboring agents in meters.
+    :param max_workers: Number of worker processes (default: number of CPUs).
+    :return: The index of the written library.
+    """
+    if path is None:
+        path = os.environ.get("FORMATION_GAIN_LIBRARY", DEFAULT_LIBRARY)
+
+    entries = [(shape, n, formation_shape(shape, n, spacing), complete_adjacency(n))
+               for shape in shapes for n in sizes]
+
+    arrays = {}
+    index = {"keys": {}, "names": {}}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for k, (shape, n, qsMat, adj, Ar, dt) in enumerate(pool.map(_solve_entry, entries)):
+            if not check_gains(Ar, qsMat):
+                print(f"Skipping {shape} with {n} agents: gains failed verification")
+                continue
+            entry = f"e{k}"
+            arrays[entry + "_qs"] = qsMat
+            arrays[entry + "_adj"] = adj
+            arrays[entry + "_A"] = Ar
+            index["keys"][formation_key(qsMat, adj)] = entry
+            index["names"][f"{shape}:{n}"] = entry
+            print(f"{shape:>8} n={n:<3} solved in {dt:.2f} s")
+
+    arrays["index"] = np.array(json.dumps(index))
+
+    # Write atomically so that running missions never see a partial library
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return index
+
+class GainLibrary:
+    """
+    Read-only access to a precomputed gain library (no CVXPY import).
+    """
+
+    def __init__(self, path=None):
+        """
+        Open a gain library and load its index.
+
+        :param path: Library file (default: FORMATION_GAIN_LIBRARY or gain_library.npz).
+        """
+        if path is None:
+            path = os.environ.get("FORMATION_GAIN_LIBRARY", DEFAULT_LIBRARY)
+        self.path = path
+        self._data = np.load(path, allow_pickle=False)
+        try:
+            index = json.loads(str(self._data["index"]))
+        except BaseException:
+            self._data.close()
+            raise
+        self._keys = index["keys"]
+        self._names = index["names"]
+
+    def lookup(self, qsMat, adj):
+        """
+        Gains of an exact formation and adjacency.
+
+        :param qsMat: Desired formation coordinates as a 2 x n matrix.
+        :param adj: Graph adjacency matrix (n x n).
+        :return: Gain matrix, or None if the formation is not in the library.
+        """
+        entry = self._keys.get(formation_key(qsMat, adj))
+        if entry is None:
+            return None
+        return self._data[entry + "_A"]
+
+    def get(self, shape, n):
+        """
+        Catalog entry of a standard shape.
+
+        :param shape: Formation shape name.
+        :param n: Number of agents.
+        :return: Tuple (qsMat, adj, Ar).
+        """
+        entry = self._names.get(f"{shape}:{n}")
+        if entry is None:
+            raise KeyError(f"No '{shape}' formation with {n} agents in {self.path}")
+        return self._data[entry + "_qs"], self._data[entry + "_adj"], self._data[entry + "_A"]
+
+    def names(self):
+        """
+        Catalog names "shape:n" available in the library.
+        """
+        return sorted(self._names)
+
+    def close(self):
+        """
+        Close the library file.
+        """
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def library_gains(qsMat, adj, path=None):
+    """
+    Gains of a formation from the precomputed library, if available.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param path: Library file (default: FORMATION_GAIN_LIBRARY or gain_library.npz).
+    :return: Gain matrix, or None if there is no library or no matching entry.
+    """
+    if path is None:
+        path = os.environ.get("FORMATION_GAIN_LIBRARY", DEFAULT_LIBRARY)
+    path = os.path.abspath(path)
+
+    # Keep one open library per path; reopen when build_library replaced the file
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _OPEN_LIBRARIES.get(path)
+    if cached is None or cached[0] != version:
+        if cached is not None:
+            cached[1].close()
+            del _OPEN_LIBRARIES[path]
+        try:
+            library = GainLibrary(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        _OPEN_LIBRARIES[path] = cached = (version, library)
+    return cached[1].lookup(qsMat, adj)
+
+if __name__ == "__main__":
+    # Usage: python GainLibrary.py [output.npz]
+    build_library(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,166 @@
+import numpy as np
+
+from FormationStep import FormationEngine, VelocitySaturation, csr_matvec
+from GainCache import formation_gains
+from GainCheck import formation_vector
+from Topology import build_topology
+
+# Largest number of groups whose centroid formation uses a complete graph
+LEADER_COMPLETE_MAX = 64
+
+def partition_formation(qsMat, group_size):
+    """
+    Split a formation into compact groups by recursive coordinate bisection.
+
+    The agents are halved at the median of the wider coordinate until every
+    group has at most group_size agents.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param group_size: Largest group size.
+    :return: List of agent index arrays.
+    """
+    qsMat = np.asarray(qsMat, dtype=float)
+    groups = []
+    stack = [np.arange(qsMat.shape[1])]
+    while stack:
+        idx = stack.pop()
+        if idx.size <= group_size:
+            groups.append(idx)
+            continue
+        pts = qsMat[:, idx]
+        axis = int(np.argmax(np.ptp(pts, axis=1)))
+        order = idx[np.argsort(pts[axis], kind='stable')]
+        half = order.size // 2
+        stack += [order[half:], order[:half]]
+    return groups
+
+class HierarchicalFormation(VelocitySaturation):
+    """
+    Two-level formation control for large swarms.
+
+    Each group of drones runs its own formation law with a gain matrix for
+    its sub-formation, and a leader-level law drives the group centroids
+    into the formation of the desired group centroids. Both laws have zero
+    net effect on the centroid of the drones they act on (A is Hermitian
+    with A 1 = 0), so the group law only shapes the group and the leader
+    law only moves whole groups; their inputs are added per drone.
+
+    Each level converges to its shape up to a rotation and scale. An
+    alignment term, which also leaves the group centroids unchanged, pulls
+    the rotation and scale of every group to those of the centroid
+    formation, so the swarm as a whole converges to the desired formation.
+
+    The gain designs are of size group_size and number of groups instead
+    of n, and a tick costs O(n * group_size + groups^2) instead of O(n^2).
+    """
+
+    def __init__(self, qsMat, group_size, gain, leader_gain=None, align_gain=None, groups=None,
+                 topology='complete', design=formation_gains):
+        """
+        :param qsMat: Desired formation coordinates as a 2 x n matrix.
+        :param group_size: Largest number of drones per group.
+        :param gain: Control gain of the group level.
+        :param leader_gain: Control gain of the leader level, defaults to gain.
+        :param align_gain: Gain of the rotation and scale alignment, defaults to the leader gain.
+        :param groups: Optional list of drone index arrays, defaults to partition_formation.
+        :param topology: Graph inside each group (see Topology.TOPOLOGIES).
+        :param design: Gain design function design(qsMat, adj) -> Ar, e.g. FindGains.find_gains.
+        """
+        qsMat = np.asarray(qsMat, dtype=float)
+        n = qsMat.shape[1]
+        super().__init__(n)
+        leader_gain = gain if leader_gain is None else leader_gain
+        self.align_gain = leader_gain if align_gain is None else align_gain
+
+        self.groups = [np.asarray(g) for g in (groups if groups is not None else partition_formation(qsMat, group_size))]
+        if min(g.size for g in self.groups) < 3:
+            raise ValueError("Every group needs at least 3 drones for a formation gain design.")
+        if len(self.groups) < 3:
+            raise ValueError("At least 3 groups are needed for the leader-level formation.")
+        if not np.array_equal(np.sort(np.concatenate(self.groups)), np.arange(n)):
+            raise ValueError("The groups must partition the drones.")
+
+        G = len(self.groups)
+        self.group_of = np.empty(n, dtype=np.int64)
+        for k, g in enumerate(self.groups):
+            self.group_of[g] = k
+        self.group_size = np.bincount(self.group_of).astype(float)
+
+        # Group level: the sub-formation operators merged into one block-diagonal CSR operator
+        rows, cols, data = [], [], []
+        for g in self.groups:
+            qs_g = qsMat[:, g]
+            adj_g = build_topology(qs_g, method=topology)
+            e = FormationEngine(design(qs_g, adj_g), adj_g, gain)
+            r = np.repeat(np.arange(2 * g.size), np.diff(e.indptr))
+            rows.append(2 * g[r // 2] + r % 2)
+            cols.append(3 * g[e.indices // 3] + e.indices % 3)
+            data.append(e.data)
+        rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order]
+        self.data = data[order]
+        self.indptr = np.zeros(2 * n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=2 * n), out=self.indptr[1:])
+
+        # Leader level: formation of the group centroids
+        qs_c = np.column_stack([qsMat[:, g].mean(axis=1) for g in self.groups])
+        adj_c = build_topology(qs_c, method='complete' if G <= LEADER_COMPLETE_MAX else 'delaunay')
+        self.leader = FormationEngine(design(qs_c, adj_c), adj_c, leader_gain)
+
+        # Desired shapes relative to their centroids, for the rotation and scale estimates
+        z = formation_vector(qsMat)
+        z_c = formation_vector(qs_c)
+        self._zg = z - z_c[self.group_of]
+        self._zg_norm = np.bincount(self.group_of, np.abs(self._zg) ** 2)
+        self._zc = z_c - z_c.mean()
+        self._zc_norm = np.sum(np.abs(self._zc) ** 2)
+
+        # Reused by every step
+        self._gather = np.empty(self.indices.size)
+        self._centroids = np.zeros((G, 3))
+        self._out = np.empty(2 * n)
+
+    @property
+    def step_blocks(self):
+        """
+        Number of 2 x 2 gain blocks evaluated per tick (n^2 for a flat complete graph).
+        """
+        return (self.indices.size + self.leader.indices.size) // 4
+
+    def step(self, q, out=None):
+        """
+        Formation control input of both levels.
+
+        Parameters:
+        - q (numpy.ndarray): State vector (x, y, z) for all UAVs (3n,)
+        - out (numpy.ndarray): Optional output buffer (2n,); defaults to an
+          internal buffer that is overwritten by the next step
+
+        Returns:
+        - dqxy (numpy.ndarray): Control input (x, y) for all UAVs (2n,)
+        """
+        out = self._out if out is None else out
+        q = np.asarray(q, dtype=float)
+        q3 = q.reshape((self.n, 3))
+        out2 = out.reshape((self.n, 2))
+
+        # Group level
+        csr_matvec(self.indptr, self.indices, self.data, q, out, self._gather)
+
+        # Leader level on the group centroids, applied to every member
+        for d in range(2):
+            self._centroids[:, d] = np.bincount(self.group_of, q3[:, d]) / self.group_size
+        dc = self.leader.step(self._centroids.reshape(-1)).reshape((-1, 2))
+        out2 += dc[self.group_of]
+
+        # Rotation and scale of every group (a_g) and of the centroid formation (a_c)
+        p = q3[:, 0] + 1j * q3[:, 1]
+        w = np.conj(self._zg) * p
+        a_g = (np.bincount(self.group_of, w.real) + 1j * np.bincount(self.group_of, w.imag)) / self._zg_norm
+        c = self._centroids[:, 0] + 1j * self._centroids[:, 1]
+        a_c = np.vdot(self._zc, c) / self._zc_norm
+        align = self.align_gain * (a_c - a_g[self.group_of]) * self._zg
+        out2[:, 0] += align.real
+        out2[:, 1] += align.imag
+        return out
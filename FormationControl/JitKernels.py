@@ -0,0 +1,262 @@
+import os
+import warnings
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Backend used by col_avoid and formation_input, selected at import time.
+# The compiled backend is opt-in: set FORMATION_BACKEND=numba.
+BACKEND = os.environ.get('FORMATION_BACKEND', 'numpy').lower()
+
+if BACKEND not in ('numpy', 'numba'):
+    raise ValueError(f"Unknown FORMATION_BACKEND '{BACKEND}'. Available: ['numba', 'numpy']")
+
+if BACKEND == 'numba' and numba is None:
+    warnings.warn("FORMATION_BACKEND=numba requested but Numba is not installed, using NumPy.")
+    BACKEND = 'numpy'
+
+def jit(func):
+    """
+    Compile a kernel with Numba when it is installed, otherwise keep it as
+    plain Python (useful for checking the kernels against the NumPy code).
+    """
+    if numba is None:
+        return func
+    return numba.njit(cache=True)(func)
+
+@jit
+def _wrap_to_180(angle):
+    return ((angle + 180.0) % 360.0) - 180.0
+
+@jit
+def _neighbor_cones(qm, dcoll, rcoll):
+    """
+    Distances, collision avoidance indices and cone sides of all agent pairs.
+
+    Same cones as ColAvoid.cone_bounds; thtm and thtp are only set where
+    colIdx is True.
+    """
+    n = qm.shape[1]
+    Dc = np.zeros((n, n))
+    colIdx = np.zeros((n, n), dtype=np.bool_)
+    thtm = np.zeros((n, n))
+    thtp = np.zeros((n, n))
+    for i in range(n):
+        for k in range(n):
+            dx = qm[0, k] - qm[0, i]
+            dy = qm[1, k] - qm[1, i]
+            Dc[i, k] = np.sqrt(dx * dx + dy * dy)
+            colIdx[i, k] = i != k and Dc[i, k] < dcoll
+            if not colIdx[i, k]:
+                continue
+            tht = np.degrees(np.arctan2(dy, dx))
+            if Dc[i, k] <= dcoll:
+                alp = 90.0
+            else:
+                ratio = min(max(rcoll / Dc[i, k], -1.0), 1.0)
+                alp = np.abs(np.degrees(np.arcsin(ratio)))
+            thtm[i, k] = _wrap_to_180(tht - alp)
+            thtp[i, k] = _wrap_to_180(tht + alp)
+    return Dc, colIdx, thtm, thtp
+
+@jit
+def _in_cone(ang, thtm, thtp):
+    if thtm <= thtp:
+        return thtm <= ang and ang <= thtp
+    return thtm <= ang or ang <= thtp
+
+@jit
+def _turn(out, ctrl, i, thtC, thtCnew):
+    """
+    Turn the control of agent i to thtCnew, or stop it if that is not within +-90 degrees.
+    """
+    if np.abs(_wrap_to_180(thtCnew - thtC)) >= 90:
+        out[0, i] = 0.0
+        out[1, i] = 0.0
+    else:
+        ctrl_norm = np.sqrt(ctrl[0, i] ** 2 + ctrl[1, i] ** 2)
+        out[0, i] = ctrl_norm * np.cos(np.radians(thtCnew))
+        out[1, i] = ctrl_norm * np.sin(np.radians(thtCnew))
+
+@jit
+def col_avoid_kernel(qm, ctrl, dcoll, rcoll, margin=0.0):
+    """
+    Compiled dense collision avoidance with the exact heading solver.
+
+    Same semantics as ColAvoid.col_avoid(..., neighbors='dense', heading='exact').
+
+    Parameters:
+    - qm (numpy.ndarray): Coordinates in matrix form (2, n)
+    - ctrl (numpy.ndarray): Control in matrix form (2, n)
+    - dcoll (float): Collision avoidance activation distance
+    - rcoll (float): Collision avoidance circle radius
+    - margin (float): Clearance of the new heading from the cone side in
+      degrees (ColAvoid.HEADING_MARGIN)
+
+    Returns:
+    - out (numpy.ndarray): Modified control in matrix form (2, n)
+    - colIdx (numpy.ndarray): Collision avoidance index matrix (n, n)
+    - Dc (numpy.ndarray): Matrix of inter-agent distances (n, n)
+    """
+    n = qm.shape[1]
+    Dc, colIdx, cm, cp = _neighbor_cones(qm, dcoll, rcoll)
+
+    out = ctrl.copy()
+    lo = np.empty(2 * n)
+    hi = np.empty(2 * n)
+    ma = np.empty(2 * n)
+    mb = np.empty(2 * n)
+
+    for i in range(n):
+        thtC = np.degrees(np.arctan2(ctrl[1, i], ctrl[0, i]))
+
+        # Collision cones, split at -180/180
+        m = 0
+        inside = False
+        for k in range(n):
+            if not colIdx[i, k]:
+                continue
+            thtm = cm[i, k]
+            thtp = cp[i, k]
+            inside = inside or _in_cone(thtC, thtm, thtp)
+            if thtm <= thtp:
+                lo[m] = thtm
+                hi[m] = thtp
+                m += 1
+            else:
+                lo[m] = thtm
+                hi[m] = 180.0
+                lo[m + 1] = -180.0
+                hi[m + 1] = thtp
+                m += 2
+
+        if not inside:
+            continue
+
+        # Sort and merge the intervals
+        order = np.argsort(lo[:m])
+        cnt = 0
+        for o in order:
+            if cnt == 0 or lo[o] > mb[cnt - 1]:
+                ma[cnt] = lo[o]
+                mb[cnt] = hi[o]
+                cnt += 1
+            elif hi[o] > mb[cnt - 1]:
+                mb[cnt - 1] = hi[o]
+
+        # Merged interval containing the control vector angle
+        idx = 0
+        for j in range(cnt):
+            if ma[j] <= thtC:
+                idx = j
+        tha = ma[idx]
+        thb = mb[idx]
+
+        # Intervals touching -180 and 180 are one interval on the circle
+        at_ends = ma[0] == -180.0 and mb[cnt - 1] == 180.0
+        if at_ends and cnt == 1:
+            out[0, i] = 0.0
+            out[1, i] = 0.0
+            continue
+        if at_ends and idx == 0:
+            tha = ma[cnt - 1]
+        if at_ends and idx == cnt - 1:
+            thb = mb[0]
+
+        # Nearer side of the blocking interval
+        da = np.abs(_wrap_to_180(thtC - tha))
+        db = np.abs(_wrap_to_180(thb - thtC))
+        _turn(out, ctrl, i, thtC, _wrap_to_180(tha - margin if da <= db else thb + margin))
+
+    return out, colIdx, Dc
+
+@jit
+def sweep_col_avoid_kernel(qm, ctrl, dcoll, rcoll, angles):
+    """
+    Compiled dense collision avoidance with the reference angle sweep.
+
+    Same semantics as ColAvoid.col_avoid(..., neighbors='dense', heading='sweep').
+
+    Parameters:
+    - qm (numpy.ndarray): Coordinates in matrix form (2, n)
+    - ctrl (numpy.ndarray): Control in matrix form (2, n)
+    - dcoll (float): Collision avoidance activation distance
+    - rcoll (float): Collision avoidance circle radius
+    - angles (numpy.ndarray): Tested directions in degrees (ColAvoid.SWEEP_ANGLES)
+
+    Returns:
+    - out (numpy.ndarray): Modified control in matrix form (2, n)
+    - colIdx (numpy.ndarray): Collision avoidance index matrix (n, n)
+    - Dc (numpy.ndarray): Matrix of inter-agent distances (n, n)
+    """
+    n = qm.shape[1]
+    Dc, colIdx, cm, cp = _neighbor_cones(qm, dcoll, rcoll)
+
+    out = ctrl.copy()
+    for i in range(n):
+        thtC = np.degrees(np.arctan2(ctrl[1, i], ctrl[0, i]))
+
+        inside = False
+        for k in range(n):
+            if colIdx[i, k] and _in_cone(thtC, cm[i, k], cp[i, k]):
+                inside = True
+                break
+        if not inside:
+            continue
+
+        # Closest sweep angle outside every cone (the first one on ties)
+        best = np.inf
+        thtCnew = 0.0
+        for a in angles:
+            diff = np.abs(_wrap_to_180(thtC - a))
+            if diff >= best:
+                continue
+            feasible = True
+            for k in range(n):
+                if colIdx[i, k] and _in_cone(a, cm[i, k], cp[i, k]):
+                    feasible = False
+                    break
+            if feasible:
+                best = diff
+                thtCnew = a
+
+        # The reference sweep keeps the control of agents without any feasible angle
+        if best < np.inf:
+            _turn(out, ctrl, i, thtC, thtCnew)
+
+    return out, colIdx, Dc
+
+@jit
+def formation_input_kernel(q, A, Adjm, gain):
+    """
+    Compiled formation control input, see FormationStep.formation_input.
+    """
+    n = Adjm.shape[0]
+    dqxy = np.zeros(2 * n)
+    for i in range(n):
+        ux = 0.0
+        uy = 0.0
+        for j in range(n):
+            if Adjm[i, j] == 1:
+                rx = q[3 * j] - q[3 * i]
+                ry = q[3 * j + 1] - q[3 * i + 1]
+                ux += A[2 * i, 2 * j] * rx + A[2 * i, 2 * j + 1] * ry
+                uy += A[2 * i + 1, 2 * j] * rx + A[2 * i + 1, 2 * j + 1] * ry
+        dqxy[2 * i] = gain * ux
+        dqxy[2 * i + 1] = gain * uy
+    return dqxy
+
+@jit
+def csr_matvec_kernel(indptr, indices, data, x, out):
+    """
+    Compiled out = M x for a CSR matrix M, see FormationStep.FormationEngine.
+    """
+    for r in range(indptr.size - 1):
+        acc = 0.0
+        for k in range(indptr[r], indptr[r + 1]):
+            acc += data[k] * x[indices[k]]
+        out[r] = acc
+    return out
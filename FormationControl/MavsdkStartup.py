@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+from mavsdk import System
+from mavsdk.offboard import OffboardError, VelocityNedYaw, PositionNedYaw
+from mavsdk.telemetry import LandedState
+
+from Barrier import barrier_polls
+from TelemetryHub import TelemetryHub
+
+# Startup timeouts in seconds
+CONNECT_TIMEOUT = 30.0
+TAKEOFF_TIMEOUT = 30.0
+ALTITUDE_TIMEOUT = 60.0
+
+async def connect_drone(port, address="localhost", timeout=CONNECT_TIMEOUT, telemetry_rate=10):
+    """
+    Connect to one drone and wait until its connection is reported.
+
+    :param port: The MAVSDK server port for the drone.
+    :param address: The MAVSDK server address.
+    :param timeout: Maximum connection time in seconds.
+    :param telemetry_rate: Position and velocity telemetry rate in Hz.
+    :return: Connected drone System instance.
+    """
+    async def _connect():
+        drone = System(mavsdk_server_address=address, port=port)
+        await drone.connect()
+        async for state in drone.core.connection_state():
+            if state.is_connected:
+                break
+        await drone.telemetry.set_rate_position_velocity_ned(telemetry_rate)
+        return drone
+
+    drone = await asyncio.wait_for(_connect(), timeout)
+    print(f"Drone on port {port} connected")
+    return drone
+
+async def connect_swarm(ports, address="localhost", timeout=CONNECT_TIMEOUT, telemetry_rate=10):
+    """
+    Connect to all drones concurrently, each with its own timeout.
+
+    :param ports: MAVSDK server ports, one per drone.
+    :param address: The MAVSDK server address.
+    :param timeout: Maximum connection time per drone in seconds.
+    :param telemetry_rate: Position and velocity telemetry rate in Hz.
+    :return: List of connected drone System instances, in the order of ports.
+    """
+    results = await asyncio.gather(*[connect_drone(port, address, timeout, telemetry_rate) for port in ports],
+                                   return_exceptions=True)
+    failed = [(port, r) for port, r in zip(ports, results) if isinstance(r, BaseException)]
+    if failed:
+        details = ", ".join(f"{port}: {type(e).__name__} {e}".strip() for port, e in failed)
+        raise RuntimeError(f"Could not connect to {len(failed)}/{len(ports)} drones ({details})")
+    return list(results)
+
+async def wait_until(check, timeout, poll=0.1, settle=0.0, what="condition"):
+    """
+    Barrier on a telemetry condition, the asyncio version of Barrier.wait_until.
+    """
+    for delay in barrier_polls(check, timeout, poll, settle, what):
+        await asyncio.sleep(delay)
+
+async def warm_up_offboard(drones, setpoints=40, interval=0.025):
+    """
+    Stream the initial setpoints to all drones at once, then start offboard mode.
+
+    :param drones: List of connected drone System instances.
+    :param setpoints: Number of zero-velocity setpoints sent before starting.
+    :param interval: Interval between setpoints in seconds.
+    """
+    print("Sending initial setpoints...")
+    zero = VelocityNedYaw(0.0, 0.0, 0.0, 0.0)
+    for _ in range(setpoints):
+        await asyncio.gather(*[drone.offboard.set_velocity_ned(zero) for drone in drones])
+        await asyncio.sleep(interval)
+
+    results = await asyncio.gather(*[drone.offboard.start() for drone in drones], return_exceptions=True)
+    failed = [i for i, r in enumerate(results) if isinstance(r, BaseException)]
+    if failed:
+        for i in failed:
+            e = results[i]
+            print(f"Offboard start failed on drone {i}: {e._result.result if isinstance(e, OffboardError) else e}")
+        await asyncio.gather(*[drone.action.disarm() for drone in drones], return_exceptions=True)
+        raise results[failed[0]]
+    print("Offboard mode started")
+
+async def takeoff_swarm(drones, hub, altitude, tol=0.5, settle=2.0):
+    """
+    Arm, take off and climb all drones concurrently.
+
+    The fixed waits of the original procedure are replaced by telemetry
+    barriers: all drones in the air, then all within tol of the altitude
+    for settle seconds.
+
+    :param drones: List of connected drone System instances.
+    :param hub: Started TelemetryHub with the position_velocity_ned and landed_state topics.
+    :param altitude: Desired altitude in meters (negative for down).
+    :param tol: Altitude tolerance in meters.
+    :param settle: Time in seconds all drones must stay within tolerance.
+    """
+    print("Arming...")
+    await asyncio.gather(*[drone.action.arm() for drone in drones])
+    print("Taking off...")
+    await asyncio.gather(*[drone.action.takeoff() for drone in drones])
+
+    in_air = LandedState.IN_AIR.value
+    await wait_until(lambda: bool((hub.data['landed_state'][:, 0] == in_air).all()),
+                     TAKEOFF_TIMEOUT, what="all drones in the air")
+
+    print(f"Ascending to altitude {altitude}m")
+    await warm_up_offboard(drones)
+    results = await asyncio.gather(*[drone.offboard.set_position_ned(PositionNedYaw(0.0, 0.0, altitude, 0.0))
+                                     for drone in drones], return_exceptions=True)
+    failed = [i for i, r in enumerate(results) if isinstance(r, BaseException)]
+    if failed:
+        for i in failed:
+            e = results[i]
+            print(f"Setting initial position failed on drone {i}: {e._result.result if isinstance(e, OffboardError) else e}")
+        # Failed drones stop offboard and disarm; the others leave offboard mode and hold
+        await asyncio.gather(*[drone.offboard.stop() for drone in drones], return_exceptions=True)
+        await asyncio.gather(*[drones[i].action.disarm() for i in failed], return_exceptions=True)
+        raise results[failed[0]]
+
+    down = hub.data['position_velocity_ned'][:, 2]
+    await wait_until(lambda: bool((abs(down - altitude) < tol).all()),
+                     ALTITUDE_TIMEOUT, settle=settle, what=f"altitude {altitude}m")
+    print("Reached target altitude")
+
+async def start_swarm(ports, altitude, address="localhost", connect_timeout=CONNECT_TIMEOUT):
+    """
+    Bring up a swarm: connect, start the telemetry hub, take off.
+
+    Every stage runs concurrently over the drones, so the startup time does
+    not grow with the swarm size.
+
+    :param ports: MAVSDK server ports, one per drone.
+    :param altitude: Desired altitude in meters (negative for down).
+    :param address: The MAVSDK server address.
+    :param connect_timeout: Maximum connection time per drone in seconds.
+    :return: Tuple (drones, hub); the hub keeps running for the control loop.
+    """
+    t0 = time.monotonic()
+    drones = await connect_swarm(ports, address, connect_timeout)
+
+    hub = TelemetryHub(drones, topics=('position_velocity_ned', 'landed_state'))
+    await hub.start()
+    await hub.wait_ready('position_velocity_ned', connect_timeout)
+    await hub.wait_ready('landed_state', connect_timeout)
+
+    await takeoff_swarm(drones, hub, altitude)
+    print(f"Swarm of {len(drones)} ready after {time.monotonic() - t0:.1f} s")
+    return drones, hub
@@ -0,0 +1,98 @@
+import numpy as np
+
+def _grid_pairs(qm, radius):
+    """
+    Candidate pairs from a uniform grid hash with cells of size radius.
+
+    Every agent is only compared with the agents in its own and the 8
+    surrounding cells, which contain all agents closer than radius.
+    """
+    n = qm.shape[1]
+
+    # Integer cell coordinates, shifted so that the 1-cell border is non-negative
+    cell = np.floor(qm / radius).astype(np.int64)
+    cell -= cell.min(axis=1, keepdims=True) - 1
+    width = cell[1].max() + 2
+    keys = cell[0] * width + cell[1]
+
+    # Agents sorted by cell key
+    order = np.argsort(keys, kind='stable')
+    keys_sorted = keys[order]
+
+    pairs_i = []
+    pairs_k = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            nkeys = keys + dx * width + dy
+            start = np.searchsorted(keys_sorted, nkeys, side='left')
+            count = np.searchsorted(keys_sorted, nkeys, side='right') - start
+            total = count.sum()
+            if total == 0:
+                continue
+            # Expand the [start, start + count) ranges of every agent
+            offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+            pairs_i.append(np.repeat(np.arange(n), count))
+            pairs_k.append(order[np.repeat(start, count) + offset])
+
+    if not pairs_i:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_k)
+
+def _kdtree_pairs(qm, radius):
+    """
+    Candidate pairs from a KD-tree range query (requires SciPy).
+    """
+    from scipy.spatial import cKDTree
+
+    ij = cKDTree(qm.T).query_pairs(radius, output_type='ndarray')
+    return (np.concatenate((ij[:, 0], ij[:, 1])).astype(np.int64),
+            np.concatenate((ij[:, 1], ij[:, 0])).astype(np.int64))
+
+def _dense_pairs(qm, radius):
+    """
+    Candidate pairs from the full n x n scan.
+    """
+    n = qm.shape[1]
+    i, k = np.nonzero(~np.eye(n, dtype=bool))
+    return i, k
+
+NEIGHBOR_BACKENDS = {
+    'dense': _dense_pairs,
+    'grid': _grid_pairs,
+    'kdtree': _kdtree_pairs,
+}
+
+def neighbor_pairs(qm, radius, method='grid'):
+    """
+    Find all ordered agent pairs closer than a given distance.
+
+    Parameters:
+    - qm (numpy.ndarray): Coordinates in matrix form (2, n)
+    - radius (float): Neighborhood distance (pairs with distance < radius)
+    - method (str): Search backend, one of 'grid', 'kdtree' or 'dense'
+
+    Returns:
+    - i (numpy.ndarray): Agent indices, sorted ascending (m,)
+    - k (numpy.ndarray): Neighbor indices (m,)
+    - d (numpy.ndarray): Distances from agent i to neighbor k (m,)
+    """
+    if method not in NEIGHBOR_BACKENDS:
+        raise ValueError(f"Unknown neighbor search method '{method}'. "
+                         f"Available: {sorted(NEIGHBOR_BACKENDS)}")
+
+    qm = np.asarray(qm, dtype=float)
+    empty = np.zeros(0, dtype=np.int64)
+    if qm.shape[1] < 2 or not radius > 0:
+        return empty, empty, np.zeros(0)
+
+    i, k = NEIGHBOR_BACKENDS[method](qm, radius)
+
+    # Exact distance test and removal of self pairs
+    vec = qm[:, k] - qm[:, i]
+    d = np.sqrt(vec[0] * vec[0] + vec[1] * vec[1])
+    keep = (d < radius) & (i != k)
+    i, k, d = i[keep], k[keep], d[keep]
+
+    # Sort by agent, then neighbor
+    order = np.lexsort((k, i))
+    return i[order], k[order], d[order]
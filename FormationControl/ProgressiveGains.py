@@ -0,0 +1,153 @@
+import threading
+import time
+
+import numpy as np
+
+from AnalyticGains import analytic_gains
+from FindGains import GainSolver
+from GainCheck import check_gains, gain_margin
+
+# SCS accuracy of the first, immediately returned solve and of the refinements
+COARSE_OPTS = {"eps_abs": 1e-2, "eps_rel": 1e-2, "max_iters": 500}
+REFINE_OPTS = ({"eps_abs": 1e-4, "eps_rel": 1e-4}, {"eps_abs": 1e-6, "eps_rel": 1e-6})
+
+# Null-space tolerance accepted for the coarse gains
+COARSE_TOL = 1e-3
+
+class ProgressiveGains:
+    """
+    Anytime formation gain design.
+
+    start() returns validated low-accuracy gains right away and keeps
+    refining them in a background thread. Every validated improvement is
+    published atomically, so a control loop can pick up the latest gains
+    between ticks with latest() without ever blocking on the solver.
+
+    Every design (start() call) solves on its own GainSolver, handed to its
+    refinement thread together with its formation. A solver is only reused
+    for the same adjacency and once its refinement has finished, so a new
+    design neither waits for nor changes a problem that an older refinement
+    is solving. Each solver carries its own lock.
+    """
+
+    def __init__(self, solver_opts=None):
+        """
+        :param solver_opts: Base SCS keyword arguments for all stages.
+        """
+        self.solver_opts = dict(solver_opts or {})
+        self._lock = threading.Lock()
+        self._published = None  # (Ar, adj, version, stage, lam_min)
+        self._version = 0
+        self._generation = 0
+        self._solver = None  # (solver, lock) of the latest design, reused for the same adjacency
+        self._thread = None
+
+    def start(self, qsMat, adj):
+        """
+        Design gains for a new formation or topology.
+
+        :param qsMat: Desired formation coordinates as a 2 x n matrix.
+        :param adj: Graph adjacency matrix (n x n).
+        :return: Validated gains (real (2n) x (2n) matrix) usable immediately.
+        """
+        qsMat = np.array(qsMat, dtype=float)
+        adj = np.array(adj, dtype=bool)
+        adj.setflags(write=False)
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        # Closed-form gains are exact, nothing to refine
+        Ar = analytic_gains(qsMat, adj)
+        if Ar is not None:
+            self._publish(generation, Ar, adj, "analytic", qsMat)
+            return Ar
+
+        # Compile once per adjacency, re-solves are warm-started. A solver whose
+        # refinement is still running is left to it.
+        busy = self._thread is not None and self._thread.is_alive()
+        if self._solver is None or busy or not np.array_equal(self._solver[0].adj, adj):
+            self._solver = (GainSolver(adj, solver_opts=self.solver_opts), threading.Lock())
+        solver, solve_lock = self._solver
+
+        with solve_lock:
+            Ar = solver.solve(qsMat, solver_opts=COARSE_OPTS)
+            if not check_gains(Ar, qsMat, COARSE_TOL):
+                # Not usable yet: block on the first refinement instead
+                Ar = solver.solve(qsMat, solver_opts=REFINE_OPTS[0])
+                if not check_gains(Ar, qsMat, COARSE_TOL):
+                    raise ValueError("Gain design did not produce valid gains.")
+        self._publish(generation, Ar, adj, "coarse", qsMat)
+
+        self._thread = threading.Thread(target=self._refine, args=(generation, solver, solve_lock, qsMat, adj),
+                                        name="gain-refine", daemon=True)
+        self._thread.start()
+        return Ar
+
+    def latest(self):
+        """
+        Latest published gains, without blocking on the solver.
+
+        :return: Tuple (Ar, adj, version) of the gains, the adjacency they were
+                 designed for and a version that increases with every publication.
+        """
+        with self._lock:
+            if self._published is None:
+                raise RuntimeError("No gains published yet, call start() first.")
+            Ar, adj, version, _, _ = self._published
+        return Ar, adj, version
+
+    def status(self):
+        """
+        Description of the published gains.
+
+        :return: Dict with 'version', 'stage' and 'lam_min'.
+        """
+        with self._lock:
+            if self._published is None:
+                return {"version": 0, "stage": None, "lam_min": None}
+            _, _, version, stage, lam_min = self._published
+        return {"version": version, "stage": stage, "lam_min": lam_min}
+
+    def wait(self, timeout=None):
+        """
+        Wait for the background refinement to finish.
+
+        :param timeout: Maximum waiting time in seconds.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _refine(self, generation, solver, solve_lock, qsMat, adj):
+        """
+        Background refinement of one design on its own solver.
+        """
+        for k, opts in enumerate(REFINE_OPTS):
+            t0 = time.perf_counter()
+            with solve_lock:
+                if generation != self._generation:
+                    return  # Superseded by a newer start()
+                try:
+                    Ar = solver.solve(qsMat, solver_opts=opts)
+                except ValueError as e:
+                    print(f"Gain refinement stage {k + 1} failed: {e}")
+                    return
+            if check_gains(Ar, qsMat) and self._publish(generation, Ar, adj, f"refined-{k + 1}", qsMat):
+                print(f"Gain refinement stage {k + 1} published after {time.perf_counter() - t0:.2f} s")
+
+    def _publish(self, generation, Ar, adj, stage, qsMat):
+        """
+        Atomically replace the published gains if they belong to the current design.
+
+        :return: Whether the gains were published.
+        """
+        lam_min = gain_margin(Ar, qsMat)[1]
+        Ar = np.array(Ar)
+        Ar.setflags(write=False)
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._version += 1
+            self._published = (Ar, adj, self._version, stage, lam_min)
+        return True
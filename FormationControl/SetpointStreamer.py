@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import numpy as np
+
+from TelemetryHub import IntervalHistogram
+
+class SetpointStreamer:
+    """
+    Background offboard setpoint streaming for a swarm.
+
+    One task per drone holds the latest setpoint and sends it when the
+    controller changes it, and otherwise resends it at the heartbeat rate so
+    PX4 stays in offboard mode when a control tick stalls. Updates that do
+    not change the setpoint (within tol) are not sent again before the next
+    heartbeat. Each drone sends on its own, so a slow link only delays that
+    drone, and at most one request per drone is in flight.
+    """
+
+    def __init__(self, drones, send, heartbeat=5.0, tol=1e-3):
+        """
+        :param drones: List of connected drone System instances.
+        :param send: Coroutine function send(drone, *setpoint) for one drone.
+        :param heartbeat: Resend rate of an unchanged setpoint in Hz (PX4 needs more than 2 Hz).
+        :param tol: Largest change of any setpoint component that counts as unchanged.
+        """
+        self.drones = list(drones)
+        self.send = send
+        self.period = 1.0 / heartbeat
+        self.tol = tol
+        n = len(self.drones)
+
+        self._setpoints = [None] * n
+        self._last_sent = [None] * n
+        self._last_time = np.full(n, -np.inf)
+        self._events = [asyncio.Event() for _ in range(n)]
+        self._tasks = []
+
+        self.updates = 0  # Batched updates from the controller
+        self.sent = np.zeros(n, dtype=np.int64)  # Sends of new setpoints
+        self.heartbeats = np.zeros(n, dtype=np.int64)  # Resends of unchanged setpoints
+        self.skipped = np.zeros(n, dtype=np.int64)  # Updates not sent because unchanged
+        self.latency = np.zeros(n)  # Duration of the latest send per drone in seconds
+        self.round_trips = IntervalHistogram(n)  # Durations of all sends, the link latency per drone
+
+    def start(self):
+        """
+        Start one streaming task per drone.
+        """
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._stream(i), name=f"setpoints-{i}") for i in range(len(self.drones))]
+
+    async def stop(self):
+        """
+        Stop streaming; PX4 leaves offboard mode once the setpoints time out.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def update(self, setpoints):
+        """
+        Replace the setpoints of all drones (does not wait for any send).
+
+        :param setpoints: Sequence of per-drone argument tuples for send.
+        """
+        self.updates += 1
+        for i, sp in enumerate(setpoints):
+            self._setpoints[i] = tuple(sp)
+            self._events[i].set()
+        self.start()
+
+    def _changed(self, i, sp):
+        last = self._last_sent[i]
+        return last is None or any(abs(a - b) > self.tol for a, b in zip(sp, last))
+
+    async def _stream(self, i):
+        drone, event = self.drones[i], self._events[i]
+        while True:
+            try:
+                await asyncio.wait_for(event.wait(), self.period)
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+
+            sp = self._setpoints[i]
+            if sp is None:
+                continue
+            now = time.monotonic()
+            if self._changed(i, sp):
+                self.sent[i] += 1
+            elif now - self._last_time[i] >= self.period:
+                self.heartbeats[i] += 1
+            else:
+                self.skipped[i] += 1
+                continue
+
+            try:
+                await self.send(drone, *sp)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Setpoint send to drone {i} failed: {e}")
+            self._last_sent[i] = sp
+            self._last_time[i] = now
+            self.latency[i] = time.monotonic() - now
+            self.round_trips.add(i, self.latency[i])
+
+    def summary(self):
+        """
+        One-line report of the streaming counters.
+        """
+        return (f"{self.updates} updates, {int(self.sent.sum())} sent, {int(self.heartbeats.sum())} heartbeats, "
+                f"{int(self.skipped.sum())} skipped, latency max {1e3 * self.latency.max():.1f} ms")
@@ -0,0 +1,240 @@
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from GainCache import DEFAULT_CACHE_DIR
+from GainCheck import check_gains
+
+# Installed CVXPY solvers that handle the PSD constraint of the gain design
+SDP_SOLVERS = ("CLARABEL", "MOSEK", "SCS", "CVXOPT", "COPT", "SDPA")
+
+# Per-solver timing history, can be overridden with the FORMATION_SOLVER_STATS variable
+DEFAULT_STATS_PATH = os.path.join(DEFAULT_CACHE_DIR, "solver_stats.json")
+
+def sdp_solvers():
+    """
+    SDP-capable solvers available in this environment.
+
+    :return: List of CVXPY solver names.
+    """
+    import cvxpy as cp
+
+    installed = set(cp.installed_solvers())
+    return [s for s in SDP_SOLVERS if s in installed]
+
+def _stats_path(path):
+    return path or os.environ.get("FORMATION_SOLVER_STATS", DEFAULT_STATS_PATH)
+
+@contextlib.contextmanager
+def _stats_lock(path):
+    """
+    Exclusive lock on the stats file across processes (held on a side file).
+    """
+    lock_path = os.path.abspath(path) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def load_stats(path=None):
+    """
+    Read the solver timing history.
+
+    :param path: Stats file, defaults to DEFAULT_STATS_PATH.
+    :return: Dict {problem size: {solver: record}}, empty if there is no history.
+    """
+    try:
+        with open(_stats_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def record_timings(results, n, path=None):
+    """
+    Add timing results for a problem with n agents to the history.
+
+    :param results: Dict {solver: (outcome, seconds)} with outcome 'solved',
+                    'failed' or 'lost' (stopped after another solver finished,
+                    the time is then a lower bound).
+    :param n: Number of agents.
+    :param path: Stats file, defaults to DEFAULT_STATS_PATH.
+    """
+    path = _stats_path(path)
+
+    # Read, merge and replace under the lock, so concurrent runs do not lose timings
+    with _stats_lock(path):
+        stats = load_stats(path)
+        size = stats.setdefault(str(n), {})
+        for solver, (outcome, seconds) in results.items():
+            rec = size.setdefault(solver, {"solved": 0, "failed": 0, "lost": 0, "total_time": 0.0, "best_time": None})
+            rec[outcome] += 1
+            if outcome == "solved":
+                rec["total_time"] += seconds
+                rec["best_time"] = seconds if rec["best_time"] is None else min(rec["best_time"], seconds)
+
+        # Write atomically, readers must never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(stats, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+def fastest_solver(n, solvers=None, path=None):
+    """
+    Historically fastest solver for problems with n agents.
+
+    :param n: Number of agents.
+    :param solvers: Candidate solvers, defaults to sdp_solvers().
+    :param path: Stats file, defaults to DEFAULT_STATS_PATH.
+    :return: Solver name, or None while some candidate has never been raced.
+    """
+    solvers = sdp_solvers() if solvers is None else list(solvers)
+    size = load_stats(path).get(str(n), {})
+    if not solvers or any(s not in size for s in solvers):
+        return None
+
+    mean_time = {s: size[s]["total_time"] / size[s]["solved"] for s in solvers if size[s]["solved"] > 0}
+    if not mean_time:
+        return None
+    return min(mean_time, key=mean_time.get)
+
+def _race_worker(solver, qsMat, adj, results):
+    """
+    Solve the gain design with one solver and report back (runs in a child process).
+    """
+    from FindGains import find_gains
+
+    stats = {}
+    try:
+        Ar = find_gains(qsMat, adj, solver=solver, stats=stats)
+    except Exception as e:
+        results.put((solver, None, stats, repr(e)))
+        return
+    results.put((solver, Ar, stats, None))
+
+def _total_time(stats):
+    return sum(stats.get(k, 0.0) for k in ("build_time", "compile_time", "solve_time"))
+
+def race_find_gains(qsMat, adj, solvers=None, stats_path=None, timeout=None, tol=1e-5, stats=None):
+    """
+    Solve the gain design on several solvers in parallel and keep the first valid result.
+
+    Each solver runs in its own process; the remaining ones are terminated
+    as soon as one returns gains passing check_gains. Timings of all solvers
+    are added to the stats file.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param solvers: Solvers to race, defaults to sdp_solvers().
+    :param stats_path: Stats file, defaults to DEFAULT_STATS_PATH.
+    :param timeout: Maximum total time in seconds.
+    :param tol: Null-space tolerance of the validity check.
+    :param stats: If given, filled with the find_gains timings of the winning solver.
+    :return: Tuple (Ar, solver).
+    """
+    qsMat = np.array(qsMat, dtype=float)
+    adj = np.array(adj, dtype=bool)
+    solvers = sdp_solvers() if solvers is None else list(solvers)
+    if not solvers:
+        raise ValueError("No SDP-capable solver is installed.")
+
+    results = mp.Queue()
+    procs = {s: mp.Process(target=_race_worker, args=(s, qsMat, adj, results), daemon=True) for s in solvers}
+    t0 = time.perf_counter()
+    for p in procs.values():
+        p.start()
+
+    timings = {}
+    winner, Ar = None, None
+    try:
+        while winner is None and len(timings) < len(solvers):
+            remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - t0))
+            try:
+                solver, A_s, solver_stats, error = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if error is None and check_gains(A_s, qsMat, tol):
+                timings[solver] = ("solved", _total_time(solver_stats))
+                winner, Ar = solver, A_s
+                if stats is not None:
+                    stats.update(solver_stats)
+            else:
+                timings[solver] = ("failed", _total_time(solver_stats))
+                print(f"Solver {solver} failed: {error or 'invalid gains'}")
+    finally:
+        elapsed = time.perf_counter() - t0
+        for s, p in procs.items():
+            if p.is_alive():
+                p.terminate()
+            p.join()
+            timings.setdefault(s, ("lost", elapsed))
+
+    record_timings(timings, qsMat.shape[1], stats_path)
+    if winner is None:
+        raise ValueError("No solver produced valid gains.")
+    return Ar, winner
+
+def portfolio_find_gains(qsMat, adj, stats_path=None, timeout=None, tol=1e-5, stats=None):
+    """
+    Gain design with the historically fastest solver for this problem size.
+
+    Races all solvers while the history for this size is incomplete, or when
+    the chosen solver fails.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :param stats_path: Stats file, defaults to DEFAULT_STATS_PATH.
+    :param timeout: Maximum race time in seconds.
+    :param tol: Null-space tolerance of the validity check.
+    :param stats: If given, filled with the find_gains timings and the 'solver' that produced the gains.
+    :return: Real (2n) x (2n) gain matrix.
+    """
+    from FindGains import find_gains
+
+    n = np.shape(qsMat)[1]
+    solver = fastest_solver(n, path=stats_path)
+    if solver is not None:
+        solver_stats = {}
+        try:
+            Ar = find_gains(qsMat, adj, solver=solver, stats=solver_stats)
+        except ValueError:
+            Ar = None
+        seconds = _total_time(solver_stats)
+        if Ar is not None and check_gains(Ar, qsMat, tol):
+            record_timings({solver: ("solved", seconds)}, n, stats_path)
+            if stats is not None:
+                stats.update(solver_stats, solver=solver)
+            return Ar
+        record_timings({solver: ("failed", seconds)}, n, stats_path)
+
+    solver_stats = {}
+    Ar, solver = race_find_gains(qsMat, adj, stats_path=stats_path, timeout=timeout, tol=tol, stats=solver_stats)
+    if stats is not None:
+        stats.update(solver_stats, solver=solver)
+    return Ar
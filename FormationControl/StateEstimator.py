@@ -0,0 +1,98 @@
+import numpy as np
+
+class SwarmEstimator:
+    """
+    Constant-velocity Kalman filter for all drones at once.
+
+    Every drone and axis (north, east, down) has a [position, velocity]
+    state driven by white-noise acceleration. Each telemetry sample measures
+    both position and velocity, so the filter follows the drones without the
+    lag of a fixed position smoother, and positions can be predicted forward
+    to the time the next command takes effect.
+    """
+
+    def __init__(self, n, accel_noise=1.0, pos_noise=0.3, vel_noise=0.1):
+        """
+        :param n: Number of drones.
+        :param accel_noise: Standard deviation of the unmodeled acceleration in m/s^2.
+        :param pos_noise: Standard deviation of the position measurements in m.
+        :param vel_noise: Standard deviation of the velocity measurements in m/s.
+        """
+        self.n = n
+        self.q = accel_noise ** 2
+        self.R = np.diag([pos_noise ** 2, vel_noise ** 2])
+
+        self.x = np.zeros((n, 3, 2))  # [position, velocity] per drone and axis
+        self.P = np.zeros((n, 3, 2, 2))
+        self.t = np.full(n, np.nan)  # Time of the latest processed sample
+
+    @property
+    def positions(self):
+        return self.x[:, :, 0]
+
+    @property
+    def velocities(self):
+        return self.x[:, :, 1]
+
+    def update(self, values, stamps):
+        """
+        Process the new telemetry samples.
+
+        Samples whose time stamp was already processed are skipped, so the
+        same snapshot can be passed on every tick.
+
+        :param values: Position and velocity NED per drone (n x 6).
+        :param stamps: Sample times in seconds (n,), on the clock used by predict.
+        :return: Boolean mask of the drones that had a new sample.
+        """
+        values = np.asarray(values, dtype=float)
+        stamps = np.asarray(stamps, dtype=float)
+        z = np.stack((values[:, 0:3], values[:, 3:6]), axis=-1)  # (n, 3, 2)
+
+        valid = np.isfinite(stamps) & np.all(np.isfinite(values), axis=1)
+        first = valid & np.isnan(self.t)
+        new = valid & (stamps > self.t)
+
+        # First sample: start from the measurement
+        self.x[first] = z[first]
+        self.P[first] = self.R
+
+        if np.any(new):
+            dt = (stamps[new] - self.t[new])[:, np.newaxis]
+            x, P = self.x[new], self.P[new]
+
+            # Predict to the sample time
+            x[..., 0] += dt * x[..., 1]
+            F = np.zeros(dt.shape + (2, 2))
+            F[..., 0, 0] = F[..., 1, 1] = 1.0
+            F[..., 0, 1] = dt
+            Q = np.empty_like(F)
+            Q[..., 0, 0] = dt ** 4 / 4
+            Q[..., 0, 1] = Q[..., 1, 0] = dt ** 3 / 2
+            Q[..., 1, 1] = dt ** 2
+            P = F @ P @ np.swapaxes(F, -1, -2) + self.q * Q
+
+            # Update with the position and velocity measurement
+            K = P @ np.linalg.inv(P + self.R)
+            x += (K @ (z[new] - x)[..., np.newaxis])[..., 0]
+            P = P - K @ P
+
+            self.x[new], self.P[new] = x, P
+
+        self.t[valid] = np.fmax(self.t[valid], stamps[valid])
+        return new | first
+
+    def predict(self, t, out=None):
+        """
+        Positions extrapolated to time t with the estimated velocities.
+
+        :param t: Time in seconds, e.g. when the next command takes effect.
+        :param out: Optional output array (n x 3).
+        :return: Predicted positions NED (n x 3).
+        """
+        dt = np.nan_to_num(t - self.t)[:, np.newaxis]
+        if out is None:
+            out = np.empty((self.n, 3))
+        np.multiply(self.x[:, :, 1], dt, out=out)
+        out += self.x[:, :, 0]
+        return out
@@ -0,0 +1,214 @@
+import asyncio
+import time
+
+import numpy as np
+
+def _position_velocity_ned(msg):
+    p, v = msg.position, msg.velocity
+    return (p.north_m, p.east_m, p.down_m, v.north_m_s, v.east_m_s, v.down_m_s)
+
+def _landed_state(msg):
+    return (float(msg.value),)
+
+def _in_air(msg):
+    return (float(msg),)
+
+# Telemetry topics: name of the drone.telemetry stream -> (sample width, extractor)
+TOPICS = {
+    'position_velocity_ned': (6, _position_velocity_ned),
+    'landed_state': (1, _landed_state),
+    'in_air': (1, _in_air),
+}
+
+# Bin edges in seconds of the per-drone interval histograms
+INTERVAL_BINS = (0.0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, np.inf)
+
+class IntervalHistogram:
+    """
+    Fixed-bin histogram of a time interval per drone, e.g. the time between
+    telemetry samples or the round-trip of a setpoint send.
+    """
+
+    def __init__(self, n, edges=INTERVAL_BINS):
+        """
+        :param n: Number of drones.
+        :param edges: Increasing bin edges in seconds; the last one should be inf.
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros((n, self.edges.size - 1), dtype=np.int64)
+
+    def add(self, i, interval):
+        """
+        Count one interval of drone i.
+        """
+        k = int(np.searchsorted(self.edges, interval, side='right')) - 1
+        self.counts[i, min(max(k, 0), self.counts.shape[1] - 1)] += 1
+
+    def quantile(self, q):
+        """
+        Upper bin edge below which a fraction q of the intervals of every drone lie.
+
+        :return: Interval bound per drone in seconds (n,), nan for drones without samples.
+        """
+        total = self.counts.sum(axis=1)
+        cum = np.cumsum(self.counts, axis=1)
+        k = np.argmax(cum >= q * total[:, np.newaxis], axis=1)
+        return np.where(total > 0, self.edges[k + 1], np.nan)
+
+    def summary(self, q=0.95, worst=3):
+        """
+        One-line report of the drones with the highest q-quantile interval.
+        """
+        bound = self.quantile(q)
+        order = np.argsort(np.nan_to_num(bound, nan=-1.0))[::-1][:worst]
+        return ", ".join(f"drone {i}: p{100 * q:.0f} <= {1e3 * bound[i]:.0f} ms" for i in order if np.isfinite(bound[i])) \
+            or "no samples"
+
+class TelemetryHub:
+    """
+    Latest telemetry of a swarm from long-lived MAVSDK subscriptions.
+
+    One background task per drone and topic iterates the telemetry stream
+    and writes every sample, with its receive time, into a shared array.
+    The control loop reads a snapshot without awaiting anything; since the
+    writers only run between awaits of the event loop, a snapshot is always
+    consistent.
+
+    gather() bounds the wait for new samples by a per-tick deadline, so one
+    laggy link does not stall the whole swarm; drones without a new sample
+    are reported as stale. The time between consecutive samples of every
+    drone is kept in an IntervalHistogram per topic (intervals); a healthy
+    stream sits at its rate, a bad link shows up as a long tail.
+    """
+
+    def __init__(self, drones, topics=('position_velocity_ned',), retry_delay=0.5):
+        """
+        :param drones: List of connected drone System instances.
+        :param topics: Telemetry topics to subscribe to, keys of TOPICS.
+        :param retry_delay: Delay in seconds before resubscribing after a stream error.
+        """
+        unknown = [t for t in topics if t not in TOPICS]
+        if unknown:
+            raise ValueError(f"Unknown telemetry topics {unknown}. Available: {sorted(TOPICS)}")
+
+        self.drones = list(drones)
+        self.topics = tuple(topics)
+        self.retry_delay = retry_delay
+        n = len(self.drones)
+
+        # Latest sample, monotonic receive time and sample count per drone
+        self.data = {t: np.full((n, TOPICS[t][0]), np.nan) for t in self.topics}
+        self.stamp = {t: np.full(n, np.nan) for t in self.topics}
+        self.count = {t: np.zeros(n, dtype=np.int64) for t in self.topics}
+        self.intervals = {t: IntervalHistogram(n) for t in self.topics}
+        self.stale = {t: np.zeros(n, dtype=np.int64) for t in self.topics}  # Missed gather deadlines
+
+        self._arrival = {t: asyncio.Event() for t in self.topics}
+        self._ready = {t: asyncio.Event() for t in self.topics}
+        self._tasks = []
+
+    async def start(self):
+        """
+        Open one subscription per drone and topic.
+        """
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._subscribe(i, t), name=f"telemetry-{t}-{i}")
+                       for t in self.topics for i in range(len(self.drones))]
+
+    async def stop(self):
+        """
+        Close all subscriptions.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _subscribe(self, i, topic):
+        _, extract = TOPICS[topic]
+        data, stamp, count = self.data[topic], self.stamp[topic], self.count[topic]
+        intervals, arrival = self.intervals[topic], self._arrival[topic]
+        while True:
+            try:
+                async for msg in getattr(self.drones[i].telemetry, topic)():
+                    now = time.monotonic()
+                    if count[i] > 0:
+                        intervals.add(i, now - stamp[i])
+                    data[i] = extract(msg)
+                    stamp[i] = now
+                    count[i] += 1
+                    arrival.set()
+                    if count[i] == 1 and np.all(count > 0):
+                        self._ready[topic].set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Telemetry stream '{topic}' of drone {i} failed: {e}")
+            # Stream ended or failed: resubscribe
+            await asyncio.sleep(self.retry_delay)
+
+    async def wait_ready(self, topic='position_velocity_ned', timeout=None):
+        """
+        Wait until every drone has delivered at least one sample of a topic.
+
+        :param topic: Telemetry topic.
+        :param timeout: Maximum waiting time in seconds.
+        """
+        await asyncio.wait_for(self._ready[topic].wait(), timeout)
+
+    def snapshot(self, topic='position_velocity_ned', out=None):
+        """
+        Latest sample of every drone, without I/O.
+
+        :param topic: Telemetry topic.
+        :param out: Optional (values, stamps) buffers to copy into.
+        :return: Tuple (values (n x width), monotonic receive times (n,)).
+        """
+        if out is None:
+            return self.data[topic].copy(), self.stamp[topic].copy()
+        values, stamps = out
+        np.copyto(values, self.data[topic])
+        np.copyto(stamps, self.stamp[topic])
+        return values, stamps
+
+    async def gather(self, since, timeout, topic='position_velocity_ned', out=None):
+        """
+        Wait until every drone has a sample newer than since, but at most timeout seconds.
+
+        :param since: Monotonic time a sample must be newer than to count as fresh,
+                      e.g. the start of the previous control tick.
+        :param timeout: Deadline of the wait in seconds.
+        :param topic: Telemetry topic.
+        :param out: Optional (values, stamps) buffers to copy into.
+        :return: Tuple (values (n x width), monotonic receive times (n,),
+                 fresh mask (n,)). Stale drones keep their latest sample.
+        """
+        stamp, arrival = self.stamp[topic], self._arrival[topic]
+        deadline = time.monotonic() + timeout
+        while not np.all(stamp > since):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            arrival.clear()
+            try:
+                await asyncio.wait_for(arrival.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        values, stamps = self.snapshot(topic, out)
+        fresh = stamps > since
+        self.stale[topic][~fresh] += 1
+        return values, stamps, fresh
+
+    def age(self, topic='position_velocity_ned'):
+        """
+        Time in seconds since the latest sample of every drone (inf if none yet).
+        """
+        return np.nan_to_num(time.monotonic() - self.stamp[topic], nan=np.inf)
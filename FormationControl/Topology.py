@@ -0,0 +1,251 @@
+import numpy as np
+from scipy import sparse
+from scipy.linalg import null_space
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+
+from AnalyticGains import FRO_NORM
+from GainCheck import a_c2r, formation_vector, gain_margin, orthogonal_complement
+
+TOPOLOGIES = ('complete', 'knn', 'delaunay', 'bounded')
+
+def _distances(qsMat):
+    qsMat = np.asarray(qsMat, dtype=float)
+    return np.linalg.norm(qsMat[:, :, np.newaxis] - qsMat[:, np.newaxis, :], axis=0)
+
+def _symmetric(adj):
+    adj = np.asarray(adj, dtype=bool)
+    adj = adj | adj.T
+    np.fill_diagonal(adj, False)
+    return adj
+
+def knn_topology(qsMat, k=3):
+    """
+    Connect every agent to its k nearest agents in the desired formation.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param k: Number of nearest neighbors per agent.
+    :return: Symmetric boolean adjacency matrix (n x n).
+    """
+    from scipy.spatial import cKDTree
+
+    pts = np.asarray(qsMat, dtype=float).T
+    n = pts.shape[0]
+    k = min(k, n - 1)
+
+    # The closest point of every query is the agent itself
+    _, idx = cKDTree(pts).query(pts, k=k + 1)
+    adj = np.zeros((n, n), dtype=bool)
+    adj[np.repeat(np.arange(n), k), idx[:, 1:].ravel()] = True
+    return _symmetric(adj)
+
+def delaunay_topology(qsMat):
+    """
+    Edges of the Delaunay triangulation of the desired formation.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :return: Symmetric boolean adjacency matrix (n x n).
+    """
+    from scipy.spatial import Delaunay, QhullError
+
+    pts = np.asarray(qsMat, dtype=float).T
+    n = pts.shape[0]
+    try:
+        tri = Delaunay(pts)
+    except QhullError as e:
+        raise ValueError(f"No Delaunay triangulation for this formation (collinear agents?): {e}") from None
+
+    s = tri.simplices
+    adj = np.zeros((n, n), dtype=bool)
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        adj[s[:, a], s[:, b]] = True
+    return _symmetric(adj)
+
+def bounded_degree_topology(qsMat, max_degree=4):
+    """
+    Short edges with a bounded number of neighbors per agent.
+
+    Starts from the Euclidean minimum spanning tree, which keeps the graph
+    connected, and greedily adds the shortest remaining edges whose two
+    agents both have fewer than max_degree neighbors.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param max_degree: Degree bound of the greedy phase.
+    :return: Symmetric boolean adjacency matrix (n x n).
+    """
+    D = _distances(qsMat)
+    n = D.shape[0]
+
+    adj = _symmetric(minimum_spanning_tree(sparse.csr_matrix(D)).toarray() > 0)
+    degree = adj.sum(axis=1)
+
+    i, j = np.triu_indices(n, 1)
+    for e in np.argsort(D[i, j], kind='stable'):
+        a, b = i[e], j[e]
+        if not adj[a, b] and degree[a] < max_degree and degree[b] < max_degree:
+            adj[a, b] = adj[b, a] = True
+            degree[a] += 1
+            degree[b] += 1
+    return adj
+
+def _triangle_certificate(qsMat, adj):
+    """
+    Sum of the projector gains of all triangles of the graph.
+
+    Every triangle contributes a rank-1 Hermitian term with null space
+    [z_T, 1] on its agents, so the sum respects the adjacency pattern and
+    annihilates [z, 1]. If it is positive definite on the complement, the
+    gain problem is feasible.
+    """
+    n = adj.shape[0]
+    i, j = np.nonzero(np.triu(adj, 1))
+    common = adj[i] & adj[j] & (np.arange(n)[np.newaxis, :] > j[:, np.newaxis])
+    e, k = np.nonzero(common)
+    if e.size == 0:
+        return None
+
+    T = np.column_stack((i[e], j[e], k))
+    zT = formation_vector(qsMat)[T]
+    # The complement of [z_T, 1] in C^3 is spanned by conj(1 x z_T)
+    w = np.conj(np.cross(np.ones_like(zT), zT))
+    norm = np.linalg.norm(w, axis=1)
+    keep = norm > 1e-12 * np.max(norm)
+    T, w = T[keep], w[keep] / norm[keep, np.newaxis]
+
+    A = np.zeros((n, n), dtype=complex)
+    np.add.at(A, (T[:, :, np.newaxis], T[:, np.newaxis, :]), w[:, :, np.newaxis] * np.conj(w[:, np.newaxis, :]))
+    return A
+
+def _generic_rank(qsMat, adj, seed=0):
+    """
+    Rank of Q^* Re(A) Q for a random gain satisfying the linear constraints.
+
+    A Hermitian, zero outside the pattern and with A [z, 1] == 0 is
+    parametrized by its real diagonal and the complex upper edge entries.
+    """
+    n = adj.shape[0]
+    z = formation_vector(qsMat)
+    i, j = np.nonzero(np.triu(adj, 1))
+    m = i.size
+
+    # Columns: diagonal d, Re and Im of the edge entries A[i, j] = r + 1j s
+    C = np.zeros((2 * n, n + 2 * m), dtype=complex)
+    C[np.arange(n), np.arange(n)] = z
+    C[n + np.arange(n), np.arange(n)] = 1.0
+    r = n + np.arange(m)
+    s = n + m + np.arange(m)
+    C[i, r] += z[j]
+    C[j, r] += z[i]
+    C[n + i, r] += 1.0
+    C[n + j, r] += 1.0
+    C[i, s] += 1j * z[j]
+    C[j, s] -= 1j * z[i]
+    C[n + i, s] += 1j
+    C[n + j, s] -= 1j
+
+    N = null_space(np.vstack((C.real, C.imag)))
+    if N.shape[1] == 0:
+        return 0
+    x = N @ np.random.default_rng(seed).standard_normal(N.shape[1])
+
+    Re_A = np.zeros((n, n))
+    Re_A[np.arange(n), np.arange(n)] = x[:n]
+    Re_A[i, j] = Re_A[j, i] = x[n:n + m]
+
+    Q = orthogonal_complement(qsMat)
+    eig = np.linalg.eigvalsh(np.conj(Q.T) @ Re_A @ Q)
+    return int(np.sum(np.abs(eig) > 1e-9 * max(np.max(np.abs(eig)), 1e-300)))
+
+def check_topology(qsMat, adj):
+    """
+    Precheck that the gain design problem is feasible for a graph.
+
+    Checks connectivity and a minimum degree of 2 (an agent with one
+    neighbor cannot annihilate [z, 1] with a nonzero row). A positive
+    definite sum of triangle projectors proves feasibility; otherwise a
+    random gain from the constraint space must have full rank n - 2, which
+    is necessary for a positive margin.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param adj: Graph adjacency matrix (n x n).
+    :return: Tuple (feasible, reason).
+    """
+    qsMat = np.asarray(qsMat, dtype=float)
+    adj = _symmetric(adj)
+    n = adj.shape[0]
+
+    if n <= 2:
+        return False, "Number of agents (n) must be greater than 2."
+    if connected_components(sparse.csr_matrix(adj), directed=False)[0] > 1:
+        return False, "The graph is not connected."
+    if adj.sum(axis=1).min() < 2:
+        return False, "Some agents have fewer than 2 neighbors."
+
+    A = _triangle_certificate(qsMat, adj)
+    if A is not None:
+        A *= FRO_NORM / np.linalg.norm(A)
+        if gain_margin(a_c2r(-A), qsMat)[1] > 1e-8:
+            return True, "Feasible (triangle projector certificate)."
+
+    rank = _generic_rank(qsMat, adj)
+    if rank < n - 2:
+        return False, f"Rank test failed: generic gains have rank {rank} < {n - 2}."
+    return True, "Rank test passed (necessary condition only)."
+
+def build_topology(qsMat, method='delaunay', check=True, **kwargs):
+    """
+    Sparse communication graph derived from the desired formation.
+
+    :param qsMat: Desired formation coordinates as a 2 x n matrix.
+    :param method: One of TOPOLOGIES.
+    :param check: Raise a ValueError if check_topology fails.
+    :param kwargs: Passed to the graph builder (k for 'knn', max_degree for 'bounded').
+    :return: Adjacency matrix (n x n) of 0/1 floats, like the hand-written Adjm.
+    """
+    n = np.shape(qsMat)[1]
+    if method == 'complete':
+        adj = ~np.eye(n, dtype=bool)
+    elif method == 'knn':
+        adj = knn_topology(qsMat, **kwargs)
+    elif method == 'delaunay':
+        adj = delaunay_topology(qsMat)
+    elif method == 'bounded':
+        adj = bounded_degree_topology(qsMat, **kwargs)
+    else:
+        raise ValueError(f"Unknown topology '{method}'. Available: {list(TOPOLOGIES)}")
+
+    if check:
+        feasible, reason = check_topology(qsMat, adj)
+        if not feasible:
+            raise ValueError(f"Topology '{method}' is not feasible for gain design: {reason}")
+    return adj.astype(float)
+
+def topology_savings(adj):
+    """
+    Expected per-tick cost relative to the complete graph.
+
+    The formation step touches one 2 x 2 gain block per nonzero of A
+    (diagonal and both directions of every edge). The gain design SDP is
+    not included: it keeps full n x n variables and enforces the missing
+    edges as equality constraints, so a sparse graph does not shrink it.
+
+    :param adj: Graph adjacency matrix (n x n).
+    :return: Dict with the edge and degree statistics, the 2 x 2 block
+             counts of the formation step ('step_blocks', 'step_blocks_complete')
+             and their ratio ('step_speedup').
+    """
+    adj = _symmetric(adj)
+    n = adj.shape[0]
+    m = int(adj.sum()) // 2
+    degree = adj.sum(axis=1)
+    m_complete = n * (n - 1) // 2
+
+    report = {
+        'agents': n,
+        'edges': m,
+        'max_degree': int(degree.max()) if n else 0,
+        'mean_degree': float(degree.mean()) if n else 0.0,
+        'step_blocks': n + 2 * m,
+        'step_blocks_complete': n + 2 * m_complete,
+    }
+    report['step_speedup'] = report['step_blocks_complete'] / report['step_blocks']
+    return report
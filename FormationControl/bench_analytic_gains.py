@@ -0,0 +1,56 @@
+import time
+import numpy as np
+
+from AnalyticGains import analytic_gains
+from FindGains import find_gains
+from GainCheck import a_r2c, gain_margin
+from GainLibrary import complete_adjacency, formation_shape
+
+def ring_adjacency(n):
+    """
+    Adjacency of the n-cycle linking consecutive agents.
+    """
+    adj = np.zeros((n, n))
+    for i in range(n):
+        adj[i, (i + 1) % n] = adj[(i + 1) % n, i] = 1
+    return adj
+
+# (label, formation, adjacency)
+cases = [
+    ("triangle K3", formation_shape("triangle", 3), complete_adjacency(3)),
+    ("wedge K5", formation_shape("wedge", 5), complete_adjacency(5)),
+    ("grid K9", formation_shape("grid", 9), complete_adjacency(9)),
+    ("circle K10", formation_shape("circle", 10), complete_adjacency(10)),
+    ("circle C6", formation_shape("circle", 6), ring_adjacency(6)),
+    ("circle C12", formation_shape("circle", 12), ring_adjacency(12)),
+]
+repeats = 20
+
+def convergence_rate(Ar):
+    """
+    Exponential decay rate of the formation error for dq = Ar q (gain 1).
+
+    The closed loop in complex form is dz/dt = -A z, so the rate is the
+    smallest real part of the eigenvalues of A outside its [z, 1] null space.
+    """
+    eig = np.linalg.eigvals(a_r2c(Ar))
+    eig = eig[np.argsort(np.abs(eig))][2:]
+    return np.min(np.real(eig))
+
+if __name__ == "__main__":
+    print(f"{'case':>12} {'analytic [ms]':>14} {'SDP [ms]':>10} "
+          f"{'lam_min an.':>12} {'lam_min SDP':>12} {'rate an.':>9} {'rate SDP':>9}")
+    for label, qs, adj in cases:
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            A_an = analytic_gains(qs, adj)
+        t_an = 1e3 * (time.perf_counter() - t0) / repeats
+
+        t0 = time.perf_counter()
+        A_sdp = find_gains(qs, adj)
+        t_sdp = 1e3 * (time.perf_counter() - t0)
+
+        lam_an = gain_margin(A_an, qs)[1] if A_an is not None else np.nan
+        rate_an = convergence_rate(A_an) if A_an is not None else np.nan
+        print(f"{label:>12} {t_an:>14.3f} {t_sdp:>10.1f} {lam_an:>12.4f} "
+              f"{gain_margin(A_sdp, qs)[1]:>12.4f} {rate_an:>9.4f} {convergence_rate(A_sdp):>9.4f}")
@@ -0,0 +1,81 @@
+import time
+import numpy as np
+
+import JitKernels
+from ColAvoid import HEADING_SOLVERS, col_avoid
+from FormationStep import formation_input
+
+# Formation control loop parameters (same as FormationControlMavsdk.py)
+dcoll = 3.0  # Collision avoidance activation distance
+rcoll = 1.4  # Collision avoidance circle radius
+gain = 2.0 / 3  # Control gain
+
+numUAV = 100
+rate = 50  # Target control rate in Hz
+ticks = 200
+
+def control_tick(backend, heading):
+    """
+    Formation input and collision avoidance as the control loops run them,
+    through the col_avoid dispatch of the given backend.
+    """
+    def tick(q, qxy, A, Adjm):
+        previous = JitKernels.BACKEND
+        try:
+            JitKernels.BACKEND = backend
+            dqxy = formation_input(q, A, Adjm, gain)
+            u, _, _, _ = col_avoid(dqxy, qxy, dcoll, rcoll, heading=heading)
+        finally:
+            JitKernels.BACKEND = previous
+        return u
+    return tick
+
+def time_ticks(tick, states, A, Adjm):
+    """
+    Mean wall time of one control tick in milliseconds.
+    """
+    t0 = time.perf_counter()
+    for q, qxy in states:
+        tick(q, qxy, A, Adjm)
+    return 1e3 * (time.perf_counter() - t0) / len(states)
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    # Complete graph and a random gain matrix with the same block structure
+    Adjm = np.ones((numUAV, numUAV)) - np.eye(numUAV)
+    A = rng.normal(size=(2 * numUAV, 2 * numUAV)) / numUAV
+
+    # Random swarm states on a jittered grid with 2.5 m spacing
+    side = int(np.ceil(np.sqrt(numUAV)))
+    idx = np.arange(numUAV)
+    states = []
+    for _ in range(ticks):
+        pos = np.zeros((numUAV, 3))
+        pos[:, 0] = 2.5 * (idx % side + rng.uniform(-0.5, 0.5, numUAV))
+        pos[:, 1] = 2.5 * (idx // side + rng.uniform(-0.5, 0.5, numUAV))
+        pos[:, 2] = -20.0
+        states.append((pos.flatten(), pos[:, :2].flatten()))
+
+    compiled = "Numba" if JitKernels.numba is not None else "not compiled (Numba missing)"
+    print(f"{numUAV} UAVs, active backend: {JitKernels.BACKEND}, kernels: {compiled}")
+    print(f"Target {rate} Hz budget: {1e3 / rate:.1f} ms per tick")
+
+    for heading in HEADING_SOLVERS:
+        numpy_tick = control_tick('numpy', heading)
+        kernel_tick = control_tick('numba', heading)
+
+        # Agreement of the two implementations
+        err = max(np.max(np.abs(numpy_tick(q, qxy, A, Adjm) - kernel_tick(q, qxy, A, Adjm)))
+                  for q, qxy in states)
+
+        # Compile before timing
+        kernel_tick(*states[0], A, Adjm)
+
+        t_numpy = time_ticks(numpy_tick, states, A, Adjm)
+        t_kernel = time_ticks(kernel_tick, states, A, Adjm)
+
+        print(f"heading='{heading}'")
+        print(f"  NumPy tick:  {t_numpy:8.3f} ms ({1e3 / t_numpy:7.1f} Hz)")
+        print(f"  Kernel tick: {t_kernel:8.3f} ms ({1e3 / t_kernel:7.1f} Hz)")
+        print(f"  Max |u_numpy - u_kernel|: {err:.2e}")
@@ -0,0 +1,51 @@
+import time
+import numpy as np
+
+from ColAvoid import col_avoid
+
+# Collision avoidance parameters (same as the formation control scripts)
+dcoll = 3.0  # Collision avoidance activation distance
+rcoll = 1.4  # Collision avoidance circle radius
+
+# Swarm sizes to benchmark
+sizes = [3, 10, 40, 100, 250, 500, 1000, 2000]
+spacing = 2.5  # Mean inter-agent spacing in meters (constant swarm density)
+repeats = 5
+
+def random_swarm(n, rng):
+    """
+    Jittered grid of n agents with random control directions.
+
+    :param n: Number of agents.
+    :param rng: NumPy random generator.
+    :return: Tuple (dq, q) of control and coordinate vectors (2n,).
+    """
+    side = int(np.ceil(np.sqrt(n)))
+    idx = np.arange(n)
+    qm = spacing * np.vstack((idx % side, idx // side)).astype(float)
+    qm += rng.uniform(-0.5, 0.5, qm.shape) * spacing
+    q = qm.flatten(order='F')
+    dq = rng.normal(size=2 * n)
+    return dq, q
+
+def time_call(dq, q, neighbors):
+    """
+    Best-of-repeats wall time of one col_avoid call in milliseconds.
+    """
+    best = np.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        u, _, _, _ = col_avoid(dq, q, dcoll, rcoll, neighbors=neighbors)
+        best = min(best, time.perf_counter() - t0)
+    return 1e3 * best, u
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'n':>6} {'dense [ms]':>12} {'grid [ms]':>12} {'kdtree [ms]':>12} {'max |du|':>10}")
+    for n in sizes:
+        dq, q = random_swarm(n, rng)
+        t_dense, u_dense = time_call(dq, q, 'dense')
+        t_grid, u_grid = time_call(dq, q, 'grid')
+        t_kd, u_kd = time_call(dq, q, 'kdtree')
+        err = max(np.max(np.abs(u_grid - u_dense)), np.max(np.abs(u_kd - u_dense)))
+        print(f"{n:>6} {t_dense:>12.3f} {t_grid:>12.3f} {t_kd:>12.3f} {err:>10.2e}")
@@ -0,0 +1,50 @@
+import sys
+import time
+import numpy as np
+
+from FindGains import find_gains
+
+# Formation sizes to benchmark (override on the command line)
+sizes = [3, 5, 10, 20, 30]
+hops = 3  # Each agent talks to the agents up to this many places away on the circle
+
+def circle_formation(n, spacing=4.0):
+    """
+    Circular formation with the given spacing between neighboring agents.
+
+    :param n: Number of agents.
+    :param spacing: Arc length between neighbors in meters.
+    :return: Desired formation coordinates as a 2 x n matrix.
+    """
+    radius = spacing * n / (2 * np.pi)
+    angle = 2 * np.pi * np.arange(n) / n
+    return radius * np.vstack((np.cos(angle), np.sin(angle)))
+
+def ring_adjacency(n, hops):
+    """
+    Sparse adjacency linking every agent to its neighbors along the ring.
+
+    :param n: Number of agents.
+    :param hops: Number of neighbors on each side.
+    :return: Adjacency matrix (n x n).
+    """
+    adj = np.zeros((n, n))
+    for k in range(1, min(hops, n // 2) + 1):
+        for i in range(n):
+            adj[i, (i + k) % n] = adj[(i + k) % n, i] = 1
+    return adj
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(arg) for arg in sys.argv[1:]]
+
+    print(f"{'n':>4} {'edges':>6} {'build [s]':>10} {'compile [s]':>12} {'solve [s]':>10} {'total [s]':>10}")
+    for n in sizes:
+        qs = circle_formation(n)
+        adj = ring_adjacency(n, hops)
+        stats = {}
+        t0 = time.perf_counter()
+        find_gains(qs, adj, stats=stats)
+        total = time.perf_counter() - t0
+        print(f"{n:>4} {int(adj.sum()) // 2:>6} {stats['build_time']:>10.3f} "
+              f"{stats['compile_time']:>12.3f} {stats['solve_time']:>10.3f} {total:>10.3f}")
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# The control modules are flat scripts importing each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import JitKernels  # noqa: E402
+
+class FakeClock:
+    """
+    Manual clock; sleeping advances it instead of waiting.
+    """
+
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, dt):
+        self.t += dt
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("ControlScheduler.time.sleep", clock.sleep)
+    return clock
+
+@pytest.fixture(autouse=True)
+def numpy_backend(monkeypatch):
+    # Tests compare against the NumPy path unless they switch the backend themselves
+    monkeypatch.setattr(JitKernels, 'BACKEND', 'numpy')
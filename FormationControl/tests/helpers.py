@@ -0,0 +1,30 @@
+import numpy as np
+
+# Collision distance and radius used by the collision avoidance tests
+DCOLL, RCOLL = 3.0, 1.4
+
+def swarm(seed, n, extent):
+    """
+    Random formation inputs and positions of n agents, flattened as col_avoid expects.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=2 * n), rng.uniform(0, extent, 2 * n)
+
+def ring_adjacency(n, hops=2):
+    Adjm = np.zeros((n, n))
+    for i in range(n):
+        for d in range(1, hops + 1):
+            Adjm[i, (i + d) % n] = Adjm[(i + d) % n, i] = 1
+    return Adjm
+
+def hermitian_gains(rng, n):
+    """
+    Random real representation of a Hermitian gain matrix, as FindGains returns.
+    """
+    X = rng.normal(size=(n, n)) + 1j * rng.normal(size=(n, n))
+    A = -(X + X.conj().T)
+    Ar = np.zeros((2 * n, 2 * n))
+    Ar[0::2, 0::2] = Ar[1::2, 1::2] = A.real
+    Ar[0::2, 1::2] = -A.imag
+    Ar[1::2, 0::2] = A.imag
+    return Ar
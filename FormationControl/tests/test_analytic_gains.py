@@ -0,0 +1,12 @@
+import numpy as np
+
+from AnalyticGains import analytic_gains
+from GainCheck import check_gains
+
+def formation(seed, n, extent=10.0):
+    return np.random.default_rng(seed).uniform(-extent, extent, (2, n))
+
+def test_analytic_gains_valid():
+    qs = formation(3, 5)
+    Ar = analytic_gains(qs, np.ones((5, 5)) - np.eye(5))
+    assert Ar is not None and check_gains(Ar, qs)
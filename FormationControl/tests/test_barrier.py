@@ -0,0 +1,20 @@
+import pytest
+
+from Barrier import barrier_polls, wait_until
+
+def test_returns_without_polling_when_condition_holds():
+    assert list(barrier_polls(lambda: True, timeout=1.0)) == []
+
+def test_settle_restarts_when_condition_drops():
+    checks = []
+
+    def check():
+        checks.append(len(checks) != 1)  # False only on the second check
+        return checks[-1]
+
+    wait_until(check, timeout=1.0, poll=0.001, settle=0.005)
+    assert len(checks) > 3 and all(checks[2:])
+
+def test_timeout():
+    with pytest.raises(TimeoutError, match="altitude"):
+        wait_until(lambda: False, timeout=0.01, poll=0.001, what="altitude")
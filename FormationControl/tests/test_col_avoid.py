@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from ColAvoid import col_avoid
+from baseline import baseline_col_avoid
+from helpers import DCOLL, RCOLL, swarm
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n, extent", [(4, 3.0), (12, 8.0), (40, 25.0)])
+def test_sweep_matches_baseline(seed, n, extent):
+    dq, q = swarm(seed, n, extent)
+    u, m, colIdx, Dc = col_avoid(dq, q, DCOLL, RCOLL, heading='sweep')
+    u_ref, m_ref, colIdx_ref, Dc_ref = baseline_col_avoid(dq.tolist(), q.tolist(), DCOLL, RCOLL)
+
+    assert m == m_ref
+    np.testing.assert_array_equal(colIdx, colIdx_ref)
+    np.testing.assert_allclose(Dc, Dc_ref, atol=1e-12)
+    np.testing.assert_allclose(u, u_ref, atol=1e-12)
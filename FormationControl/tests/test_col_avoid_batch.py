@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from ColAvoid import col_avoid, col_avoid_batch
+from helpers import DCOLL, RCOLL, swarm
+
+@pytest.mark.parametrize("heading", ['sweep', 'exact'])
+def test_batch_matches_single(heading):
+    states = [swarm(seed, 15, 10.0) for seed in range(6)]
+    dq = np.array([s[0] for s in states])
+    q = np.array([s[1] for s in states])
+    u, n, colIdx, Dc = col_avoid_batch(dq, q, DCOLL, RCOLL, heading=heading)
+
+    assert n == 15
+    for b in range(len(states)):
+        u_b, _, colIdx_b, Dc_b = col_avoid(dq[b], q[b], DCOLL, RCOLL, heading=heading)
+        np.testing.assert_allclose(u[b], u_b, atol=1e-12)
+        np.testing.assert_array_equal(colIdx[b], colIdx_b)
+        np.testing.assert_allclose(Dc[b], Dc_b, atol=1e-12)
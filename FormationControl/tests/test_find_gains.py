@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cvxpy")
+
+from FindGains import find_gains
+from GainCheck import check_gains
+from Topology import build_topology
+
+def formation(seed, n, extent=10.0):
+    return np.random.default_rng(seed).uniform(-extent, extent, (2, n))
+
+@pytest.mark.parametrize("method", ['complete', 'delaunay'])
+def test_find_gains_valid(method):
+    qs = formation(0, 6)
+    adj = build_topology(qs, method=method) > 0
+    Ar = find_gains(qs, adj)
+    assert check_gains(Ar, qs)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from FormationStep import FormationEngine, VelocitySaturation
+from baseline import baseline_formation_input, baseline_saturate, baseline_soft_saturate
+from helpers import hermitian_gains, ring_adjacency
+
+@pytest.mark.parametrize("Adjm", [np.ones((7, 7)) - np.eye(7), ring_adjacency(7)])
+def test_engine_step_matches_baseline(Adjm):
+    rng = np.random.default_rng(2)
+    n = Adjm.shape[0]
+    A = hermitian_gains(rng, n)
+    engine = FormationEngine(A, Adjm, 2.0 / 3)
+
+    for _ in range(3):
+        q = rng.uniform(-10, 10, 3 * n)
+        expected = baseline_formation_input(q, A, Adjm, 2.0 / 3)
+        np.testing.assert_allclose(engine.step(q), expected, atol=1e-12)
+        np.testing.assert_allclose(engine.operator @ q, expected, atol=1e-12)
+
+def test_engine_set_gains():
+    rng = np.random.default_rng(3)
+    n = 6
+    Adjm = ring_adjacency(n)
+    engine = FormationEngine(hermitian_gains(rng, n), Adjm, 1.0)
+
+    A = hermitian_gains(rng, n)
+    engine.set_gains(A, gain=0.25)
+    q = rng.uniform(-10, 10, 3 * n)
+    np.testing.assert_allclose(engine.step(q), baseline_formation_input(q, A, Adjm, 0.25), atol=1e-12)
+
+def test_saturate_matches_baseline():
+    rng = np.random.default_rng(4)
+    u = rng.normal(scale=0.5, size=40)
+    u[:4] = [1e-3, 0.0, 0.0, 0.0]  # Inside the dead zone and exactly zero
+
+    expected = baseline_saturate(u.copy(), 0.6, 0.01)
+    result = VelocitySaturation(20).saturate(u.copy(), 0.6, 0.01)
+    np.testing.assert_allclose(result, expected, atol=1e-12)
+
+def test_soft_saturate_matches_baseline():
+    rng = np.random.default_rng(5)
+    u = rng.normal(scale=0.5, size=40)
+    u[:4] = [1e-3, 0.0, 0.0, 0.0]
+
+    expected = baseline_soft_saturate(u.copy(), 0.8, 0.01)
+    result = VelocitySaturation(20).soft_saturate(u.copy(), 0.8, 0.01)
+    np.testing.assert_allclose(result, expected, atol=1e-12)
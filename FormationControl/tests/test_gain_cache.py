@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from GainCache import cached_find_gains, formation_key, gain_key, load_gains, save_gains
+from GainCheck import check_gains
+
+def triangle():
+    qs = np.array([[0.0, 4.0, 2.0], [0.0, 0.0, 3.0]])
+    return qs, np.ones((3, 3)) - np.eye(3)
+
+def test_keys_follow_content():
+    qs, adj = triangle()
+    assert formation_key(qs, adj) == formation_key(qs.copy(), adj.astype(bool))
+    assert formation_key(qs, adj) != formation_key(qs + 1e-9, adj)
+    assert gain_key(qs, adj) != gain_key(qs, adj, solver_opts={"eps_abs": 1e-6})
+    assert gain_key(qs, adj, solver="SCS") != gain_key(qs, adj, solver="CLARABEL")
+
+def test_load_rejects_missing_and_invalid_files(tmp_path):
+    qs, _ = triangle()
+    path = str(tmp_path / "gains.npy")
+    assert load_gains(path, qs) is None
+
+    save_gains(path, np.eye(6))  # Not annihilating [z, 1]
+    assert load_gains(path, qs) is None
+
+    with open(path, "wb") as f:
+        f.write(b"not an npy file")
+    assert load_gains(path, qs) is None
+
+def test_cache_hit_skips_solver(tmp_path, monkeypatch):
+    pytest.importorskip("cvxpy")
+    import FindGains
+
+    qs, adj = triangle()
+
+    calls = []
+    solve = FindGains.find_gains
+
+    def counting_find_gains(*args, **kwargs):
+        calls.append(1)
+        return solve(*args, **kwargs)
+
+    monkeypatch.setattr(FindGains, "find_gains", counting_find_gains)
+    Ar = cached_find_gains(qs, adj, cache_dir=str(tmp_path))
+    assert check_gains(Ar, qs) and len(calls) == 1
+    assert len(os.listdir(tmp_path)) == 1
+
+    np.testing.assert_array_equal(cached_find_gains(qs, adj, cache_dir=str(tmp_path)), Ar)
+    assert len(calls) == 1
+
+    # A corrupted entry is solved again and replaced
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    np.save(path, np.zeros_like(Ar))
+    assert check_gains(cached_find_gains(qs, adj, cache_dir=str(tmp_path)), qs)
+    assert len(calls) == 2
+    assert check_gains(np.load(path), qs)
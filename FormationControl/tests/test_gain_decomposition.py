@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cvxpy")
+
+from GainCheck import check_gains, gain_margin
+from GainDecomposition import decomposed_find_gains, sparse_gain_margin
+from Topology import build_topology
+
+def formation(seed, n, extent=10.0):
+    return np.random.default_rng(seed).uniform(-extent, extent, (2, n))
+
+def strip(seed, n, k):
+    # Random agents along a 2n x 3 strip with a k nearest neighbor graph
+    rng = np.random.default_rng(seed)
+    qs = np.vstack((rng.uniform(0, 2 * n, n), rng.uniform(0, 3, n)))
+    return qs, build_topology(qs, method='knn', k=k, check=False) > 0
+
+def assert_valid(Ar, qs):
+    residual, lam_min = sparse_gain_margin(Ar, qs)
+    residual_ref, lam_min_ref = gain_margin(Ar.toarray(), qs)
+    assert residual == pytest.approx(residual_ref, rel=1e-6, abs=1e-12)
+    assert lam_min == pytest.approx(lam_min_ref, rel=1e-6)
+    assert check_gains(Ar.toarray(), qs)
+
+def test_decomposed_gains_valid():
+    rng = np.random.default_rng(4)
+    xx, yy = np.meshgrid(2.0 * np.arange(10), 2.0 * np.arange(3))
+    qs = np.vstack((xx.ravel(), yy.ravel())) + rng.uniform(-0.3, 0.3, (2, 30))
+    adj = build_topology(qs, method='knn', k=4) > 0
+    assert_valid(decomposed_find_gains(qs, adj, dense=False), qs)
+
+@pytest.mark.parametrize("seed", [1, 3, 4])
+def test_decomposed_gains_valid_on_random_strips(seed):
+    qs, adj = strip(seed, 30, 5)
+    assert_valid(decomposed_find_gains(qs, adj, dense=False), qs)
+
+def test_decomposition_retries_with_larger_clusters():
+    # Clusters of 5 agents leave a null space larger than [z, 1] on this strip
+    qs, adj = strip(2, 30, 4)
+    with pytest.raises(ValueError, match="find_gains"):
+        decomposed_find_gains(qs, adj, cluster_size=5, overlap=2, retries=0)
+    assert_valid(decomposed_find_gains(qs, adj, cluster_size=5, overlap=2, dense=False), qs)
+
+def test_decomposition_rejects_single_cluster():
+    qs = formation(5, 6)
+    with pytest.raises(ValueError):
+        decomposed_find_gains(qs, np.ones((6, 6), dtype=bool) & ~np.eye(6, dtype=bool))
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cvxpy")
+
+from FindGains import GainSolver
+from GainCheck import check_gains
+from Topology import build_topology
+
+def formation(seed, n, extent=10.0):
+    return np.random.default_rng(seed).uniform(-extent, extent, (2, n))
+
+def test_gain_solver_resolves_valid():
+    qs = formation(1, 7)
+    adj = build_topology(qs, method='delaunay') > 0
+    solver = GainSolver(adj)
+    assert check_gains(solver.solve(qs), qs)
+
+    # Warm-started re-solve for a nearby shape
+    qs2 = qs + np.random.default_rng(2).normal(scale=0.3, size=qs.shape)
+    assert check_gains(solver.solve(qs2), qs2)
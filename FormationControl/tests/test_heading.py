@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import JitKernels
+from ColAvoid import HEADING_MARGIN, col_avoid, cone_bounds, exact_heading, in_cone, sweep_heading, wrap_to_180
+
+def random_cones(rng, agents=200, per_agent=4):
+    """
+    Collision cones of random neighbors for a batch of agents.
+    """
+    grp = np.repeat(np.arange(agents), per_agent)
+    d = rng.uniform(1.5, 6.0, grp.size)
+    tht = rng.uniform(-180, 180, grp.size)
+    thtm, thtp = cone_bounds(d, tht, 1.0, 1.4)
+    thtC = rng.uniform(-180, 180, agents)
+    starts = np.arange(0, grp.size, per_agent)
+    return thtC, thtm, thtp, grp, starts
+
+def blocked(ang, thtm, thtp, grp):
+    return np.bincount(grp, in_cone(ang[grp], thtm, thtp), minlength=ang.size) > 0
+
+def test_exact_heading_within_sweep_feasible_set():
+    rng = np.random.default_rng(0)
+    thtC, thtm, thtp, grp, starts = random_cones(rng)
+    sweep, sweep_feas = sweep_heading(thtC, thtm, thtp, starts)
+    exact, exact_feas = exact_heading(thtC, thtm, thtp, grp)
+
+    # Every agent with a feasible sweep angle has a feasible exact heading outside all cones
+    assert np.all(exact_feas[sweep_feas])
+    assert not np.any(blocked(exact, thtm, thtp, grp)[exact_feas])
+
+    # ... which turns no further than the sweep angle
+    inside = blocked(thtC, thtm, thtp, grp) & sweep_feas
+    turn_exact = np.abs(wrap_to_180(exact - thtC))[inside]
+    turn_sweep = np.abs(wrap_to_180(sweep - thtC))[inside]
+    assert np.all(turn_exact <= turn_sweep + HEADING_MARGIN)
+
+def test_exact_heading_leaves_closed_cone_boundary():
+    # Control vector exactly on the upper side of a single cone
+    thtm, thtp = np.array([-30.0]), np.array([30.0])
+    thtC = np.array([30.0])
+    assert in_cone(thtC, thtm, thtp)[0]
+
+    thtCnew, has_feas = exact_heading(thtC, thtm, thtp, np.array([0]))
+    assert has_feas[0]
+    assert not in_cone(thtCnew, thtm, thtp)[0]
+    assert thtCnew[0] == pytest.approx(30.0 + HEADING_MARGIN)
+
+def test_exact_heading_full_coverage():
+    thtm, thtp = np.array([-180.0, 0.0]), np.array([10.0, 180.0])
+    _, has_feas = exact_heading(np.array([5.0]), thtm, thtp, np.array([0, 0]))
+    assert not has_feas[0]
+
+def test_col_avoid_defaults_to_sweep():
+    rng = np.random.default_rng(1)
+    q = rng.uniform(0, 8, 40)
+    dq = rng.normal(size=40)
+    u_default = col_avoid(dq, q, 3.0, 1.4)[0]
+    u_sweep = col_avoid(dq, q, 3.0, 1.4, heading='sweep')[0]
+    np.testing.assert_array_equal(u_default, u_sweep)
+
+def test_exact_result_outside_cones():
+    rng = np.random.default_rng(2)
+    n = 30
+    q = rng.uniform(0, 20, 2 * n)
+    dq = rng.normal(size=2 * n)
+    u, _, colIdx, Dc = col_avoid(dq, q, 3.0, 1.4, heading='exact')
+
+    qm = q.reshape((2, n), order='F')
+    um = u.reshape((2, n), order='F')
+    i, k = np.nonzero(colIdx)
+    vec = qm[:, k] - qm[:, i]
+    thtm, thtp = cone_bounds(Dc[i, k], np.degrees(np.arctan2(vec[1], vec[0])), 3.0, 1.4)
+    moving = np.hypot(um[0], um[1]) > 0
+    assert np.count_nonzero(moving & np.any(um != dq.reshape((2, n), order='F'), axis=0)) > 5
+    hit = in_cone(np.degrees(np.arctan2(um[1, i], um[0, i])), thtm, thtp) & moving[i]
+    assert not np.any(hit)
+
+def test_kernel_matches_exact():
+    rng = np.random.default_rng(3)
+    n = 25
+    q = rng.uniform(0, 10, 2 * n)
+    dq = rng.normal(size=2 * n)
+    u = col_avoid(dq, q, 3.0, 1.4, heading='exact')[0]
+
+    qm = q.reshape((2, n), order='F').copy()
+    ctrl = dq.reshape((2, n), order='F').copy()
+    u_kernel = JitKernels.col_avoid_kernel(qm, ctrl, 3.0, 1.4, HEADING_MARGIN)[0].flatten(order='F')
+    np.testing.assert_allclose(u_kernel, u, atol=1e-9)
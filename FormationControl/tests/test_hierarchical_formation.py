@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from AnalyticGains import analytic_gains
+from GainCheck import formation_vector
+from HierarchicalFormation import HierarchicalFormation, partition_formation
+
+def formation(seed, n, extent=10.0):
+    return np.random.default_rng(seed).uniform(-extent, extent, (2, n))
+
+def engine(qs, group_size=5, **kwargs):
+    # Complete groups have a closed-form gain design, so no SDP is solved
+    return HierarchicalFormation(qs, group_size, 1.0, design=analytic_gains, **kwargs)
+
+def state(xy, alt=-5.0):
+    return np.column_stack((xy.T, np.full(xy.shape[1], alt))).ravel()
+
+def test_partition_covers_every_agent_once():
+    qs = formation(0, 37)
+    groups = partition_formation(qs, 6)
+    assert max(g.size for g in groups) <= 6
+    assert np.array_equal(np.sort(np.concatenate(groups)), np.arange(37))
+
+@pytest.mark.parametrize("groups, message", [
+    ([np.arange(0, 2), np.arange(2, 6), np.arange(6, 10), np.arange(10, 14)], "at least 3 drones"),
+    ([np.arange(0, 7), np.arange(7, 14)], "At least 3 groups"),
+    ([np.arange(0, 5), np.arange(4, 9), np.arange(9, 14)], "partition"),
+])
+def test_invalid_groups_raise(groups, message):
+    with pytest.raises(ValueError, match=message):
+        engine(formation(1, 14), groups=groups)
+
+def test_step_blocks_below_flat_complete_graph():
+    n = 40
+    assert engine(formation(2, n)).step_blocks < n ** 2
+
+def test_desired_formation_is_equilibrium():
+    qs = formation(3, 20)
+    e = engine(qs)
+
+    # Any rotation, scale and translation of the desired formation
+    rot = 1.7 * np.array([[np.cos(0.6), -np.sin(0.6)], [np.sin(0.6), np.cos(0.6)]])
+    dq = e.step(state(rot @ qs + np.array([[3.0], [-4.0]])))
+    assert np.max(np.abs(dq)) < 1e-9
+
+def test_group_level_keeps_group_centroids():
+    qs = formation(4, 20)
+    e = engine(qs, leader_gain=0.0, align_gain=1.0)
+    dq = e.step(state(formation(5, 20))).reshape((-1, 2))
+    for g in e.groups:
+        assert np.allclose(dq[g].mean(axis=0), 0.0, atol=1e-9)
+
+def test_swarm_converges_to_formation():
+    qs = formation(6, 20)
+    e = engine(qs)
+    xy = qs + np.random.default_rng(7).normal(scale=2.0, size=qs.shape)
+    for _ in range(4000):
+        xy = xy + 0.01 * e.step(state(xy)).reshape((-1, 2)).T
+
+    # Converged up to a rotation, scale and translation of the desired shape
+    z = formation_vector(qs) - formation_vector(qs).mean()
+    p = formation_vector(xy) - formation_vector(xy).mean()
+    a = np.vdot(z, p) / np.vdot(z, z)
+    assert abs(a) > 0.1
+    assert np.linalg.norm(p - a * z) < 1e-3 * np.linalg.norm(p)
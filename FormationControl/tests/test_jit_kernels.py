@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import JitKernels
+from ColAvoid import col_avoid
+from FormationStep import formation_input
+from baseline import baseline_formation_input
+from helpers import DCOLL, RCOLL, hermitian_gains, ring_adjacency, swarm
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("heading", ['sweep', 'exact'])
+def test_numba_backend_matches_numpy(monkeypatch, seed, heading):
+    dq, q = swarm(seed, 30, 15.0)
+    u_ref, _, colIdx_ref, Dc_ref = col_avoid(dq, q, DCOLL, RCOLL, heading=heading)
+    monkeypatch.setattr(JitKernels, 'BACKEND', 'numba')
+    u, _, colIdx, Dc = col_avoid(dq, q, DCOLL, RCOLL, heading=heading)
+
+    np.testing.assert_allclose(u, u_ref, atol=1e-9)
+    np.testing.assert_array_equal(colIdx, colIdx_ref)
+    np.testing.assert_allclose(Dc, Dc_ref, atol=1e-12)
+
+@pytest.mark.parametrize("n, Adjm", [(6, None), (10, ring_adjacency(10))])
+def test_formation_input_matches_baseline(n, Adjm):
+    rng = np.random.default_rng(0)
+    Adjm = np.ones((n, n)) - np.eye(n) if Adjm is None else Adjm
+    A = hermitian_gains(rng, n)
+    q = rng.uniform(-10, 10, 3 * n)
+
+    expected = baseline_formation_input(q, A, Adjm, 2.0 / 3)
+    np.testing.assert_allclose(formation_input(q, A, Adjm, 2.0 / 3), expected, atol=1e-12)
+
+def test_formation_input_numba_backend(monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 8
+    Adjm = ring_adjacency(n)
+    A = hermitian_gains(rng, n)
+    q = rng.uniform(-10, 10, 3 * n)
+    expected = formation_input(q, A, Adjm, 0.5)
+    monkeypatch.setattr(JitKernels, 'BACKEND', 'numba')
+    np.testing.assert_allclose(formation_input(q, A, Adjm, 0.5), expected, atol=1e-12)
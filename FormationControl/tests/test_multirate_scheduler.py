@@ -0,0 +1,33 @@
+import pytest
+
+from ControlScheduler import MultiRateScheduler
+
+def test_invalid_ratio():
+    with pytest.raises(ValueError):
+        MultiRateScheduler(0.05, 0.2)
+
+def test_multi_rate_outer_every_ratio_ticks(clock):
+    scheduler = MultiRateScheduler(0.2, 0.05, clock=clock)
+    outer = []
+    for _ in range(12):
+        now, is_outer = scheduler.tick()
+        outer.append(is_outer)
+        clock.t += 0.02 if is_outer else 0.005
+    assert outer == [True, False, False, False] * 3
+    assert scheduler.outer_ticks == 3
+
+    stats = scheduler.stats()
+    assert stats['outer']['period_mean'] == pytest.approx(0.2)
+    assert stats['outer']['work_mean'] == pytest.approx(0.02)
+    assert stats['inner']['ticks'] == 12
+    assert stats['inner']['inner_work_mean'] == pytest.approx(0.005)
+
+def test_multi_rate_skips_missed_outer_deadlines(clock):
+    scheduler = MultiRateScheduler(0.2, 0.05, clock=clock)
+    scheduler.tick()
+    clock.t += 0.5  # Overrun past the outer deadlines at 0.2 and 0.4
+    now, is_outer = scheduler.tick()
+    assert now == pytest.approx(0.5)  # Next inner deadline
+    assert is_outer  # Runs for the latest missed outer deadline (0.4)
+    assert scheduler.outer_missed == 1
+    assert scheduler.outer_latency.max == pytest.approx(0.1)
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from ColAvoid import col_avoid
+from helpers import DCOLL, RCOLL, swarm
+
+@pytest.mark.parametrize("neighbors", ['grid', 'kdtree'])
+@pytest.mark.parametrize("heading", ['sweep', 'exact'])
+def test_sparse_neighbors_match_dense(neighbors, heading):
+    dq, q = swarm(11, 60, 30.0)
+    u, _, colIdx, Dc = col_avoid(dq, q, DCOLL, RCOLL, neighbors=neighbors, heading=heading)
+    u_ref, _, colIdx_ref, Dc_ref = col_avoid(dq, q, DCOLL, RCOLL, heading=heading)
+
+    np.testing.assert_allclose(u, u_ref, atol=1e-12)
+    np.testing.assert_array_equal(colIdx.toarray(), colIdx_ref)
+    np.testing.assert_allclose(Dc.toarray(), np.where(colIdx_ref, Dc_ref, 0.0), atol=1e-12)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cvxpy")
+
+from GainCheck import check_gains
+from ProgressiveGains import ProgressiveGains
+from Topology import build_topology
+
+def test_new_topology_supersedes_running_refinement():
+    qs = np.random.default_rng(0).uniform(-10, 10, (2, 10))
+    knn = build_topology(qs, method='knn', k=5) > 0
+    delaunay = build_topology(qs, method='delaunay') > 0
+
+    gains = ProgressiveGains()
+    assert check_gains(gains.start(qs, knn), qs, 1e-3)
+    # The knn refinement is still running
+    Ar = gains.start(qs, delaunay)
+    assert check_gains(Ar, qs, 1e-3)
+    gains.wait()
+
+    Ar, adj, version = gains.latest()
+    np.testing.assert_array_equal(adj, delaunay)
+    assert check_gains(Ar, qs)
+
+def test_same_topology_reuses_finished_solver():
+    qs = np.random.default_rng(1).uniform(-10, 10, (2, 8))
+    adj = build_topology(qs, method='knn', k=4) > 0
+
+    gains = ProgressiveGains()
+    gains.start(qs, adj)
+    gains.wait()
+    version = gains.latest()[2]
+
+    qs2 = qs + np.random.default_rng(2).normal(scale=0.3, size=qs.shape)
+    gains.start(qs2, adj)
+    gains.wait()
+    Ar, _, version2 = gains.latest()
+    assert version2 > version
+    assert check_gains(Ar, qs2)
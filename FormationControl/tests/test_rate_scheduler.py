@@ -0,0 +1,35 @@
+import pytest
+
+from ControlScheduler import RateScheduler
+
+def test_ticks_on_absolute_deadlines(clock):
+    scheduler = RateScheduler(0.1, clock=clock)
+    starts = []
+    for _ in range(5):
+        starts.append(scheduler.tick())
+        clock.t += 0.03  # Work does not add up to drift
+    assert starts == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4])
+    assert scheduler.overruns == 0
+    assert scheduler.work.mean == pytest.approx(0.03)
+
+def test_skip_drops_missed_deadlines(clock):
+    scheduler = RateScheduler(0.1, overrun='skip', clock=clock)
+    scheduler.tick()
+    clock.t += 0.25  # Runs past the deadlines at 0.1 and 0.2
+    assert scheduler.tick() == pytest.approx(0.3)
+    assert scheduler.overruns == 1
+    assert scheduler.missed == 2
+
+def test_catch_up_runs_missed_ticks(clock):
+    scheduler = RateScheduler(0.1, overrun='catch_up', clock=clock)
+    scheduler.tick()
+    clock.t += 0.25
+    starts = [scheduler.tick() for _ in range(3)]
+    assert starts == pytest.approx([0.25, 0.25, 0.3])
+    assert scheduler.missed == 0
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        RateScheduler(0.1, overrun='wait')
+    with pytest.raises(ValueError):
+        RateScheduler(0.0)
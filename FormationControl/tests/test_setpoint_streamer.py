@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import numpy as np
+
+from SetpointStreamer import SetpointStreamer
+
+class FakeLink:
+    """
+    Records the setpoints sent to every drone.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    async def send(self, drone, *setpoint):
+        self.calls.append((drone, setpoint, time.monotonic()))
+
+    def sent_to(self, drone):
+        return [(sp, t) for d, sp, t in self.calls if d == drone]
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_unchanged_setpoints_are_skipped():
+    async def scenario():
+        link = FakeLink()
+        streamer = SetpointStreamer(['a', 'b'], link.send, heartbeat=1.0, tol=1e-3)
+        for k in range(5):
+            # Changes within tol count as unchanged
+            streamer.update([(1.0 + 1e-4 * k, 0.0, 0.0, 90.0), (0.0, 0.0, 0.0, 0.0)])
+            await asyncio.sleep(0.01)
+        streamer.update([(1.5, 0.0, 0.0, 90.0), (0.0, 0.0, 0.0, 0.0)])
+        await asyncio.sleep(0.01)
+        await streamer.stop()
+        return link, streamer
+
+    link, streamer = run(scenario())
+    assert streamer.updates == 6
+    np.testing.assert_array_equal(streamer.sent, [2, 1])
+    np.testing.assert_array_equal(streamer.skipped, [4, 5])
+    np.testing.assert_array_equal(streamer.heartbeats, [0, 0])
+    assert [sp for sp, _ in link.sent_to('a')] == [(1.0, 0.0, 0.0, 90.0), (1.5, 0.0, 0.0, 90.0)]
+    assert len(link.sent_to('b')) == 1
+
+def test_heartbeat_resends_unchanged_setpoint():
+    async def scenario():
+        link = FakeLink()
+        streamer = SetpointStreamer(['a'], link.send, heartbeat=20.0)
+        streamer.update([(0.5, 0.0, 0.0, 0.0)])
+        await asyncio.sleep(0.33)  # The controller stalls
+        await streamer.stop()
+        return link, streamer
+
+    link, streamer = run(scenario())
+    sends = link.sent_to('a')
+    assert streamer.sent[0] == 1
+    assert 4 <= streamer.heartbeats[0] <= 7
+    assert len(sends) == 1 + streamer.heartbeats[0]
+    assert all(sp == (0.5, 0.0, 0.0, 0.0) for sp, _ in sends)
+    gaps = np.diff([t for _, t in sends])
+    assert np.all(gaps >= 0.045)
+
+def test_failed_send_keeps_streaming():
+    async def scenario():
+        calls = []
+
+        async def send(drone, *setpoint):
+            calls.append(setpoint)
+            if len(calls) == 1:
+                raise RuntimeError("link down")
+
+        streamer = SetpointStreamer(['a'], send, heartbeat=20.0)
+        streamer.update([(1.0, 0.0, 0.0, 0.0)])
+        await asyncio.sleep(0.08)
+        await streamer.stop()
+        return calls, streamer
+
+    calls, streamer = run(scenario())
+    assert len(calls) >= 2
+    assert streamer.heartbeats[0] >= 1
+    assert streamer.round_trips.counts[0].sum() == len(calls)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from StateEstimator import SwarmEstimator
+
+def samples(t, p0, v):
+    """
+    Position and velocity NED of drones moving at constant velocity.
+    """
+    return np.hstack((p0 + v * t, v))
+
+def test_first_sample_initializes_state():
+    est = SwarmEstimator(3)
+    values = np.arange(18, dtype=float).reshape(3, 6)
+    stamps = np.array([1.0, np.nan, 2.0])  # No sample of drone 1 yet
+
+    new = est.update(values, stamps)
+    np.testing.assert_array_equal(new, [True, False, True])
+    np.testing.assert_array_equal(est.positions[[0, 2]], values[[0, 2], 0:3])
+    np.testing.assert_array_equal(est.velocities[[0, 2]], values[[0, 2], 3:6])
+    np.testing.assert_array_equal(est.P[0], np.broadcast_to(est.R, (3, 2, 2)))
+    np.testing.assert_array_equal(est.t, [1.0, np.nan, 2.0])
+
+def test_repeated_stamps_are_skipped():
+    est = SwarmEstimator(2)
+    values = np.ones((2, 6))
+    stamps = np.array([1.0, 1.0])
+    est.update(values, stamps)
+    x, P = est.x.copy(), est.P.copy()
+
+    # The same snapshot again, e.g. on a tick without new telemetry
+    new = est.update(values + 5.0, stamps)
+    assert not new.any()
+    np.testing.assert_array_equal(est.x, x)
+    np.testing.assert_array_equal(est.P, P)
+
+    # Only the drone with a newer sample is updated
+    new = est.update(values + 5.0, np.array([1.0, 1.5]))
+    np.testing.assert_array_equal(new, [False, True])
+    np.testing.assert_array_equal(est.x[0], x[0])
+    assert not np.array_equal(est.x[1], x[1])
+
+def test_predict_extrapolates_constant_velocity():
+    rng = np.random.default_rng(0)
+    p0 = rng.uniform(-10, 10, (4, 3))
+    v = rng.uniform(-2, 2, (4, 3))
+    est = SwarmEstimator(4)
+
+    # Noise-free samples of the motion model leave the estimate on the trajectory
+    for t in (0.0, 0.1, 0.2, 0.35):
+        est.update(samples(t, p0, v), np.full(4, t))
+    np.testing.assert_allclose(est.predict(0.5), p0 + v * 0.5, atol=1e-9)
+
+    out = np.empty((4, 3))
+    assert est.predict(0.35, out=out) is out
+    np.testing.assert_allclose(out, p0 + v * 0.35, atol=1e-9)
+
+def test_filter_smooths_position_noise():
+    rng = np.random.default_rng(1)
+    p0 = np.zeros((50, 3))
+    v = np.tile([1.0, 0.5, 0.0], (50, 1))
+    est = SwarmEstimator(50)
+
+    for t in np.arange(0, 5, 0.1):
+        noisy = samples(t, p0, v) + np.hstack((rng.normal(scale=0.3, size=(50, 3)), np.zeros((50, 3))))
+        est.update(noisy, np.full(50, t))
+    err = est.positions - (p0 + v * t)
+    assert np.sqrt(np.mean(err ** 2)) < 0.1  # Against 0.3 per sample
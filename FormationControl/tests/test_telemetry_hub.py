@@ -0,0 +1,78 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from TelemetryHub import IntervalHistogram, TelemetryHub
+
+def position_velocity(k):
+    return SimpleNamespace(position=SimpleNamespace(north_m=k, east_m=2.0 * k, down_m=-20.0),
+                           velocity=SimpleNamespace(north_m_s=1.0, east_m_s=2.0, down_m_s=0.0))
+
+class FakeDrone:
+    """
+    Drone whose position_velocity_ned stream delivers samples at a fixed
+    period, and stops after a number of samples (the link stalls).
+    """
+
+    def __init__(self, period, samples=None):
+        self.period = period
+        self.samples = samples
+        self.telemetry = SimpleNamespace(position_velocity_ned=self._stream)
+
+    async def _stream(self):
+        k = 0
+        while self.samples is None or k < self.samples:
+            yield position_velocity(float(k))
+            k += 1
+            await asyncio.sleep(self.period)
+        await asyncio.Event().wait()
+
+def test_gather_waits_for_fresh_samples_until_deadline():
+    async def scenario():
+        hub = TelemetryHub([FakeDrone(0.01), FakeDrone(0.01, samples=1)])
+        async with hub:
+            await hub.wait_ready(timeout=1.0)
+            since = time.monotonic()
+            t0 = time.monotonic()
+            values, stamps, fresh = await hub.gather(since, timeout=0.05)
+            waited = time.monotonic() - t0
+            return hub, values, stamps, fresh, since, waited
+
+    hub, values, stamps, fresh, since, waited = asyncio.run(scenario())
+    np.testing.assert_array_equal(fresh, [True, False])
+    assert stamps[0] > since >= stamps[1]
+    assert 0.04 <= waited < 0.5
+    np.testing.assert_array_equal(hub.stale['position_velocity_ned'], [0, 1])
+
+    # The stalled drone keeps its latest sample
+    np.testing.assert_array_equal(values[1], [0.0, 0.0, -20.0, 1.0, 2.0, 0.0])
+    assert values[0, 0] >= 1.0
+
+def test_gather_returns_as_soon_as_all_drones_are_fresh():
+    async def scenario():
+        hub = TelemetryHub([FakeDrone(0.01), FakeDrone(0.02)])
+        async with hub:
+            await hub.wait_ready(timeout=1.0)
+            since = time.monotonic()
+            out = (np.empty((2, 6)), np.empty(2))
+            t0 = time.monotonic()
+            values, stamps, fresh = await hub.gather(since, timeout=1.0, out=out)
+            return hub, values, stamps, fresh, out, time.monotonic() - t0
+
+    hub, values, stamps, fresh, out, waited = asyncio.run(scenario())
+    assert fresh.all()
+    assert waited < 0.5
+    assert values is out[0] and stamps is out[1]
+    assert not hub.stale['position_velocity_ned'].any()
+
+def test_interval_histogram_quantile():
+    hist = IntervalHistogram(2)
+    for interval in [0.005] * 19 + [0.3]:
+        hist.add(0, interval)
+    hist.add(1, 5.0)
+
+    np.testing.assert_array_equal(hist.quantile(0.9), [0.01, np.inf])
+    np.testing.assert_array_equal(hist.quantile(1.0), [0.5, np.inf])
+    assert np.isnan(IntervalHistogram(1).quantile(0.5)).all()
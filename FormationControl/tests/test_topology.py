@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from GainCheck import check_gains
+from Topology import build_topology, check_topology, topology_savings
+
+def ring(n, hops=1):
+    adj = np.zeros((n, n), dtype=bool)
+    for i in range(n):
+        for d in range(1, hops + 1):
+            adj[i, (i + d) % n] = adj[(i + d) % n, i] = True
+    return adj
+
+def pendant():
+    # Complete graph of 4 agents plus a fifth agent with a single neighbor
+    adj = np.zeros((5, 5), dtype=bool)
+    adj[:4, :4] = ~np.eye(4, dtype=bool)
+    adj[3, 4] = adj[4, 3] = True
+    return adj
+
+def formation(seed, n):
+    return np.random.default_rng(seed).uniform(-5, 5, (2, n))
+
+def test_triangle_certificate_proves_feasibility():
+    qs = formation(0, 6)
+    feasible, reason = check_topology(qs, ring(6, hops=2))
+    assert feasible and "certificate" in reason
+
+@pytest.mark.parametrize("method", ['delaunay', 'knn', 'bounded'])
+def test_built_topologies_are_feasible(method):
+    qs = formation(1, 12)
+    adj = build_topology(qs, method=method)
+    assert check_topology(qs, adj)[0]
+
+def test_certified_topology_gives_valid_gains():
+    pytest.importorskip("cvxpy")
+    from FindGains import find_gains
+
+    qs = formation(2, 7)
+    adj = build_topology(qs, method='delaunay') > 0
+    assert "certificate" in check_topology(qs, adj)[1]
+    assert check_gains(find_gains(qs, adj), qs)
+
+def test_rank_test_rejects_ring():
+    # Every agent of a plain ring has two neighbors, but the constraint
+    # space only contains the zero gain
+    feasible, reason = check_topology(formation(3, 6), ring(6))
+    assert not feasible and "Rank test failed" in reason
+
+def test_rank_test_without_triangles():
+    # The complete bipartite graph K(3, 3) has no triangles
+    adj = np.zeros((6, 6), dtype=bool)
+    adj[:3, 3:] = True
+    feasible, reason = check_topology(formation(4, 6), adj | adj.T)
+    assert feasible and "necessary condition only" in reason
+
+@pytest.mark.parametrize("adj, message", [
+    (np.ones((2, 2)) - np.eye(2), "greater than 2"),
+    (np.kron(np.eye(2), np.ones((3, 3))) - np.eye(6), "not connected"),
+    (pendant(), "fewer than 2 neighbors"),
+])
+def test_structural_rejections(adj, message):
+    n = adj.shape[0]
+    feasible, reason = check_topology(formation(5, n), adj)
+    assert not feasible and message in reason
+
+def test_build_topology_raises_for_infeasible_graph():
+    qs = np.array([[0.0, 1.0, 2.0, 3.0], [0.0, 0.0, 0.0, 0.0]])  # Collinear
+    with pytest.raises(ValueError):
+        build_topology(qs, method='delaunay')
+
+def test_topology_savings():
+    report = topology_savings(ring(10))
+    assert report['edges'] == 10 and report['max_degree'] == 2
+    assert report['step_blocks'] == 10 + 2 * 10
+    assert report['step_blocks_complete'] == 10 + 2 * 45
+    assert report['step_speedup'] == pytest.approx(100 / 30)